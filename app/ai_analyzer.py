@@ -1,164 +1,179 @@
-from typing import List, Dict, Any
-from models import Issue, Recommendation
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from models import Issue, Recommendation, RootCause
 from rag_knowledge_base import RAGKnowledgeBase
-import re
+from rule_engine import RuleEngine, render_template
+from config import settings
+from history import ClusterHistory
+from node_analysis import index_pods_by_node, node_fields, fold_pod_issues
+from resilience import DependencyUnavailable
+from shared_state import StateBackend
 import logging
-import asyncio
+import time
 
 logger = logging.getLogger(__name__)
 
+# Log lines are truncated before matching and before they end up in issue descriptions
+MAX_LOG_LINE_LENGTH = 300
+
+class _PodFields:
+    """Read-only view of a pod record plus history-derived fields for rule matching"""
+    __slots__ = ("pod", "extra")
+
+    def __init__(self, pod, extra: Dict[str, Any]):
+        self.pod = pod
+        self.extra = extra
+
+    def get(self, key: str, default=None):
+        if key in self.extra:
+            return self.extra[key]
+        return self.pod.get(key, default)
+
 class AIAnalyzer:
-    def __init__(self):
-        self.rag_kb = RAGKnowledgeBase()
-        self.issue_patterns = {
-            "CrashLoopBackOff": {
-                "severity": "high",
-                "description": "Pod is crashing repeatedly",
-                "remediation": "Check pod logs and fix application issues"
-            },
-            "OOMKilled": {
-                "severity": "high", 
-                "description": "Pod killed due to out of memory",
-                "remediation": "Increase memory limits or optimize application"
-            },
-            "ImagePullBackOff": {
-                "severity": "medium",
-                "description": "Cannot pull container image",
-                "remediation": "Check image name, registry access, and credentials"
-            },
-            "Pending": {
-                "severity": "medium",
-                "description": "Pod cannot be scheduled",
-                "remediation": "Check resource requests and node capacity"
-            }
-        }
-        # Initialize RAG knowledge base
-        asyncio.create_task(self._initialize_rag())
+    def __init__(self, state: Optional[StateBackend] = None):
+        self.rag_kb = RAGKnowledgeBase(state=state)
+        # Filled by the background sampler; read by rate and trend rules
+        self.history = ClusterHistory()
+        # Declarative detection rules (rules/*.yaml plus RULES_PATH), hot-reloaded
+        self.rules = RuleEngine()
     
-    async def _initialize_rag(self):
-        """Initialize RAG knowledge base"""
+    async def initialize_rag(self):
+        """Initialize RAG knowledge base (and, with several workers, keep it in step)"""
         try:
-            await self.rag_kb.initialize_knowledge_base()
-            logger.info("RAG knowledge base initialized")
+            await self.rag_kb.run()
         except Exception as e:
             logger.error(f"Failed to initialize RAG: {e}")
     
-    def detect_issues(self, pods: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> List[Issue]:
+    def _history_fields(self, pod, now: float) -> Dict[str, Any]:
+        """Fields derived from the pod's sampled history, used by rate and trend rules"""
+        fields = {"history_covered": False}
+        series = self.history.get(pod["namespace"], pod["name"])
+        if series is None:
+            return fields
+        
+        recent = series.restarts_in_window(settings.RESTART_RATE_WINDOW, now)
+        if recent is not None and recent[1] >= settings.RESTART_RATE_WINDOW / 2:
+            fields["history_covered"] = True
+            fields["recent_restarts"] = recent[0]
+            fields["history_minutes"] = recent[1] / 60
+        
+        trend = series.memory_trend()
+        if trend is not None:
+            slope, latest = trend
+            fields["memory_slope"] = slope
+            fields["memory_latest"] = latest
+            if slope > 0 and latest < 100:
+                fields["minutes_to_memory_limit"] = (100 - latest) / slope
+        return fields
+    
+    def detect_issues(self, pods: List[Dict[str, Any]], events: List[Dict[str, Any]],
+                      logs: Optional[Dict[str, List[str]]] = None, namespace: str = "default") -> List[Issue]:
+        """Run the detection rules over pods, events and (optionally) pod logs in one pass each"""
+        self.rules.maybe_reload()
+        ruleset = self.rules.ruleset
         issues = []
+        now = time.time()
         
-        # Analyze pod status
         for pod in pods:
-            if pod["status"] in self.issue_patterns:
-                issue = Issue(
-                    type=pod["status"],
-                    severity=self.issue_patterns[pod["status"]]["severity"],
-                    resource=f"Pod/{pod['name']}",
-                    description=self.issue_patterns[pod["status"]]["description"],
-                    namespace=pod["namespace"]
-                )
-                issues.append(issue)
-            
-            # Check restart count
-            if pod["restarts"] > 5:
-                issue = Issue(
-                    type="HighRestartCount",
-                    severity="medium",
-                    resource=f"Pod/{pod['name']}",
-                    description=f"Pod has restarted {pod['restarts']} times",
-                    namespace=pod["namespace"]
-                )
-                issues.append(issue)
+            issues.extend(ruleset.evaluate("pod", _PodFields(pod, self._history_fields(pod, now)), namespace))
         
-        # Analyze events
         for event in events:
-            if event["type"] == "Warning":
-                if "OOMKilled" in event["reason"]:
-                    issue = Issue(
-                        type="OOMKilled",
-                        severity="high",
-                        resource=event["object"],
-                        description=event["message"],
-                        namespace="default"
-                    )
-                    issues.append(issue)
-                elif "Failed" in event["reason"]:
-                    issue = Issue(
-                        type="FailedEvent",
-                        severity="medium",
-                        resource=event["object"],
-                        description=event["message"],
-                        namespace="default"
-                    )
-                    issues.append(issue)
+            issues.extend(ruleset.evaluate("event", event, namespace))
+        
+        # One issue per pod and issue type, however many lines match
+        for pod_name, lines in (logs or {}).items():
+            seen_types = set()
+            for line in lines:
+                fields = {"message": line[:MAX_LOG_LINE_LENGTH], "name": pod_name, "namespace": namespace}
+                for issue in ruleset.evaluate("log", fields, namespace):
+                    if issue.type not in seen_types:
+                        seen_types.add(issue.type)
+                        issues.append(issue)
         
         return issues
     
+    def detect_node_issues(self, nodes: Dict[str, Dict[str, Any]], pods, issues: List[Issue],
+                           namespace: str = "default") -> Tuple[List[Issue], List[RootCause]]:
+        """Correlate pod issues by node and run the node rules, in O(pods).
+
+        Only nodes hosting pods of the namespace are evaluated. Returns the
+        issue list with node findings added (and, with NODE_FOLD_POD_ISSUES,
+        the pod issues they explain removed) plus one root cause per node.
+        """
+        if not nodes:
+            return issues, []
+        ruleset = self.rules.ruleset
+        index = index_pods_by_node(pods)
+        failing = set()
+        for issue in issues:
+            kind, _, name = issue.resource.partition("/")
+            if kind == "Pod":
+                failing.add(name)
+        
+        node_issues = []
+        for node_name, node_pods in index.items():
+            summary = nodes.get(node_name)
+            if summary is not None:
+                node_issues.extend(ruleset.evaluate("node", node_fields(summary, node_pods, failing), namespace))
+        
+        if not settings.NODE_FOLD_POD_ISSUES:
+            _, root_causes = fold_pod_issues(issues, node_issues, index)
+            return node_issues + issues, root_causes
+        return fold_pod_issues(issues, node_issues, index)
+    
     async def generate_recommendations(self, issues: List[Issue]) -> List[Recommendation]:
-        recommendations = []
+        return [rec async for rec in self.iter_recommendations(issues)]
+    
+    async def iter_recommendations(self, issues: List[Issue]) -> AsyncIterator[Recommendation]:
+        """Yield recommendations as each one (and its RAG lookup) completes"""
+        specs = self.rules.ruleset.recommendations
+        # Issues of the same type in the same namespace share one RAG lookup
+        rag_solutions: Dict[tuple, str] = {}
+        needs_resource_advice = False
         
         for issue in issues:
-            # Get RAG-enhanced recommendations
+            spec = specs.get(issue.type)
+            if not spec:
+                continue
+            needs_resource_advice = needs_resource_advice or spec.get("resource_optimization", False)
+            fields = {
+                "name": issue.resource.split('/')[-1],
+                "namespace": issue.namespace,
+                "resource": issue.resource,
+                "type": issue.type
+            }
+            
             try:
-                rag_solution = await self.rag_kb.get_contextual_solution(
-                    issue.type, 
-                    {"status": issue.type, "namespace": issue.namespace}
-                )
-                
-                # Create enhanced recommendation with RAG content
-                if issue.type == "OOMKilled":
-                    rec = Recommendation(
-                        issue_type=issue.type,
-                        action="Increase Memory Limits (RAG-Enhanced)",
-                        description=f"AI Analysis: {rag_solution[:200]}...",
-                        command="kubectl patch deployment <deployment-name> -p '{\"spec\":{\"template\":{\"spec\":{\"containers\":[{\"name\":\"<container-name>\",\"resources\":{\"limits\":{\"memory\":\"512Mi\"}}}]}}}}'"
-                    )
-                    recommendations.append(rec)
-                
-                elif issue.type == "CrashLoopBackOff":
-                    rec = Recommendation(
-                        issue_type=issue.type,
-                        action="Diagnose Crash Loop (RAG-Enhanced)",
-                        description=f"AI Analysis: {rag_solution[:200]}...",
-                        command=f"kubectl logs {issue.resource.split('/')[-1]} -n {issue.namespace} --previous"
-                    )
-                    recommendations.append(rec)
-                
-                elif issue.type == "ImagePullBackOff":
-                    rec = Recommendation(
-                        issue_type=issue.type,
-                        action="Fix Image Pull Issues (RAG-Enhanced)",
-                        description=f"AI Analysis: {rag_solution[:200]}...",
-                        command=f"kubectl describe pod {issue.resource.split('/')[-1]} -n {issue.namespace}"
-                    )
-                    recommendations.append(rec)
+                description = render_template(spec.get("description"), fields) or issue.description
+                if spec.get("rag"):
+                    key = (issue.type, issue.namespace)
+                    if key not in rag_solutions:
+                        rag_solutions[key] = await self.rag_kb.get_contextual_solution(
+                            issue.type, 
+                            {"status": issue.type, "namespace": issue.namespace}
+                        )
+                    description = f"AI Analysis: {rag_solutions[key][:200]}..."
                 
-                elif issue.type == "Pending":
-                    rec = Recommendation(
-                        issue_type=issue.type,
-                        action="Resolve Scheduling Issues (RAG-Enhanced)",
-                        description=f"AI Analysis: {rag_solution[:200]}...",
-                        command=f"kubectl describe pod {issue.resource.split('/')[-1]} -n {issue.namespace}"
-                    )
-                    recommendations.append(rec)
-                
-                elif issue.type == "HighRestartCount":
-                    rec = Recommendation(
-                        issue_type=issue.type,
-                        action="Investigate Frequent Restarts (RAG-Enhanced)",
-                        description=f"AI Analysis: {rag_solution[:200]}...",
-                        command=f"kubectl describe pod {issue.resource.split('/')[-1]} -n {issue.namespace}"
-                    )
-                    recommendations.append(rec)
+                rec = Recommendation(
+                    issue_type=issue.type,
+                    action=spec["action"],
+                    description=description,
+                    command=render_template(spec.get("command"), fields)
+                )
                 
+            except DependencyUnavailable as e:
+                # Vector store slow or degraded: fail fast to the rule's basic advice
+                logger.warning(f"RAG skipped for {issue.type}: {e}")
+                rec = self._get_basic_recommendation(issue)
             except Exception as e:
                 logger.error(f"Error generating RAG recommendation for {issue.type}: {e}")
                 # Fallback to basic recommendations
                 rec = self._get_basic_recommendation(issue)
-                if rec:
-                    recommendations.append(rec)
+            if rec:
+                yield rec
         
         # Add general RAG-enhanced recommendations
-        if any(issue.type in ["OOMKilled", "HighRestartCount"] for issue in issues):
+        if needs_resource_advice:
+            rec = None
             try:
                 general_advice = await self.rag_kb.query_knowledge_base(
                     "resource optimization kubernetes best practices", n_results=1
@@ -170,35 +185,26 @@ class AIAnalyzer:
                         description=f"AI Guidance: {general_advice[0]['content'][:200]}...",
                         command="kubectl top pods --all-namespaces"
                     )
-                    recommendations.append(rec)
+            except DependencyUnavailable as e:
+                logger.warning(f"RAG skipped for general advice: {e}")
             except Exception as e:
                 logger.error(f"Error generating general RAG recommendation: {e}")
-        
-        return recommendations
+            if rec:
+                yield rec
     
-    def _get_basic_recommendation(self, issue: Issue) -> Recommendation:
-        """Fallback basic recommendations when RAG fails"""
-        basic_recs = {
-            "OOMKilled": Recommendation(
-                issue_type=issue.type,
-                action="Increase Memory Limits",
-                description="Pod was killed due to memory constraints. Increase memory limits.",
-                command="kubectl patch deployment <deployment-name> -p '{\"spec\":{\"template\":{\"spec\":{\"containers\":[{\"name\":\"<container-name>\",\"resources\":{\"limits\":{\"memory\":\"512Mi\"}}}]}}}}'"
-            ),
-            "CrashLoopBackOff": Recommendation(
-                issue_type=issue.type,
-                action="Check Application Logs",
-                description="Pod is crashing repeatedly. Check logs for application errors.",
-                command=f"kubectl logs {issue.resource.split('/')[-1]} -n {issue.namespace}"
-            ),
-            "ImagePullBackOff": Recommendation(
-                issue_type=issue.type,
-                action="Verify Image and Registry Access",
-                description="Cannot pull container image. Check image name and registry credentials.",
-                command=f"kubectl describe pod {issue.resource.split('/')[-1]} -n {issue.namespace}"
-            )
-        }
-        return basic_recs.get(issue.type)
+    def _get_basic_recommendation(self, issue: Issue) -> Optional[Recommendation]:
+        """Fallback basic recommendations when RAG fails, from the rule's fallback block"""
+        spec = self.rules.ruleset.recommendations.get(issue.type) or {}
+        fallback = spec.get("fallback")
+        if not fallback:
+            return None
+        fields = {"name": issue.resource.split('/')[-1], "namespace": issue.namespace, "resource": issue.resource}
+        return Recommendation(
+            issue_type=issue.type,
+            action=fallback["action"],
+            description=render_template(fallback.get("description"), fields) or issue.description,
+            command=render_template(fallback.get("command"), fields)
+        )
     
     async def get_intelligent_insights(self, cluster_data: Dict[str, Any]) -> List[str]:
         """Get AI-powered insights about cluster health"""
@@ -207,7 +213,12 @@ class AIAnalyzer:
         try:
             # Query RAG for general cluster health insights
             health_query = f"kubernetes cluster health monitoring best practices"
-            rag_results = await self.rag_kb.query_knowledge_base(health_query, n_results=2)
+            try:
+                rag_results = await self.rag_kb.query_knowledge_base(health_query, n_results=2)
+            except DependencyUnavailable as e:
+                # Keep the data-driven insights below when the vector store is degraded
+                logger.warning(f"RAG skipped for insights: {e}")
+                rag_results = []
             
             for result in rag_results:
                 if result['relevance_score'] > 0.6:
@@ -220,6 +231,9 @@ class AIAnalyzer:
             if cluster_data.get('high_restart_pods', 0) > 0:
                 insights.append(f"🔄 {cluster_data['high_restart_pods']} pods have high restart counts")
             
+            if cluster_data.get('high_memory_pods', 0) > 0:
+                insights.append(f"🧠 {cluster_data['high_memory_pods']} pods are near their memory limit")
+            
         except Exception as e:
             logger.error(f"Error generating intelligent insights: {e}")
             insights.append("💡 Enable detailed monitoring for better insights")
@@ -233,6 +247,8 @@ class AIAnalyzer:
             "running_pods": len([p for p in pods if p["status"] == "Running"]),
             "problematic_pods": len([p for p in pods if p["status"] not in ["Running", "Succeeded"]]),
             "high_restart_pods": len([p for p in pods if p["restarts"] > 3]),
+            "high_memory_pods": len([p for p in pods if (p.get("memory_percent") or 0) >= settings.MEMORY_USAGE_THRESHOLD]),
+            "high_cpu_pods": len([p for p in pods if (p.get("cpu_percent") or 0) >= settings.CPU_USAGE_THRESHOLD]),
             "suggestions": []
         }
         
@@ -242,6 +258,12 @@ class AIAnalyzer:
         if analysis["high_restart_pods"] > 0:
             analysis["suggestions"].append("Review pods with high restart counts for stability issues")
         
+        if analysis["high_memory_pods"] > 0:
+            analysis["suggestions"].append("Raise memory limits or reduce usage for pods near their limit before they are OOMKilled")
+        
+        if analysis["high_cpu_pods"] > 0:
+            analysis["suggestions"].append("Review CPU limits for throttled pods")
+        
         # Add cost optimization suggestions
         if analysis["total_pods"] > 10:
             analysis["suggestions"].append("Consider implementing horizontal pod autoscaling")
@@ -0,0 +1,261 @@
+"""Synthetic cluster generator and an in-process stand-in for ``CoreV1Api``.
+
+The objects produced here expose the same attributes the application reads
+from the official Kubernetes client models, so ``KubernetesClient`` can be
+pointed at a ``FakeCoreV1Api`` without any other changes.
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+# Fraction of pods in each failure state; the remainder are healthy and Running
+DEFAULT_FAILURE_MIX = {
+    "CrashLoopBackOff": 0.03,
+    "OOMKilled": 0.02,
+    "ImagePullBackOff": 0.02,
+    "Pending": 0.02,
+    "Failed": 0.01,
+}
+
+EVENT_TEMPLATES = {
+    "CrashLoopBackOff": ("Warning", "BackOff", "Back-off restarting failed container"),
+    "OOMKilled": ("Warning", "OOMKilled", "Container was OOMKilled"),
+    "ImagePullBackOff": ("Warning", "Failed", "Failed to pull image \"registry.local/app:missing\""),
+    "Pending": ("Warning", "FailedScheduling", "0/3 nodes are available: 3 Insufficient cpu."),
+    "Failed": ("Warning", "FailedMount", "Unable to attach or mount volumes"),
+    "Running": ("Normal", "Started", "Started container app"),
+}
+
+def parse_failure_mix(spec: str) -> Dict[str, float]:
+    """Parse ``"CrashLoopBackOff=0.05,Pending=0.1"`` into a failure mix"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        state, _, fraction = part.partition("=")
+        if state not in EVENT_TEMPLATES:
+            raise ValueError(f"Unknown pod state in failure mix: {state}")
+        mix[state] = float(fraction)
+    if sum(mix.values()) > 1.0:
+        raise ValueError("Failure mix fractions must sum to at most 1.0")
+    return mix
+
+def _container_status(state: str, restarts: int):
+    waiting = None
+    last_state = SimpleNamespace(terminated=None)
+    ready = state == "Running"
+    if state in ("CrashLoopBackOff", "ImagePullBackOff"):
+        waiting = SimpleNamespace(reason=state, message=None)
+    elif state == "OOMKilled":
+        last_state = SimpleNamespace(terminated=SimpleNamespace(reason="OOMKilled", exit_code=137))
+    return SimpleNamespace(
+        name="app",
+        ready=ready,
+        restart_count=restarts,
+        state=SimpleNamespace(waiting=waiting, running=None if waiting else SimpleNamespace(), terminated=None),
+        last_state=last_state,
+    )
+
+def _phase_for(state: str) -> str:
+    if state in ("Pending", "ImagePullBackOff"):
+        return "Pending"
+    if state == "Failed":
+        return "Failed"
+    return "Running"
+
+class FakeCluster:
+    """A generated set of pods, events, nodes and usage samples for one namespace"""
+
+    def __init__(self, pods: List[SimpleNamespace], events: List[SimpleNamespace],
+                 nodes: List[SimpleNamespace], namespace: str,
+                 usage: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.pods = pods
+        self.events = events
+        self.nodes = nodes
+        self.namespace = namespace
+        # pod name -> (cpu millicores, memory MiB)
+        self.usage = usage or {}
+
+def generate_cluster(n_pods: int = 1000, n_events: int = 500,
+                     failure_mix: Optional[Dict[str, float]] = None,
+                     namespace: str = "default", n_nodes: int = 20,
+                     seed: int = 42, not_ready_nodes: int = 0) -> FakeCluster:
+    """Generate a synthetic namespace with N pods and M events
+
+    The first ``not_ready_nodes`` nodes report Ready=False and every pod
+    scheduled on them is crash looping.
+    """
+    rng = random.Random(seed)
+    mix = DEFAULT_FAILURE_MIX if failure_mix is None else failure_mix
+    states = list(mix.keys()) + ["Running"]
+    weights = list(mix.values()) + [max(0.0, 1.0 - sum(mix.values()))]
+    now = datetime.now(timezone.utc)
+
+    nodes = [
+        SimpleNamespace(
+            metadata=SimpleNamespace(name=f"ip-10-0-{i // 256}-{i % 256}.ec2.internal", labels={}),
+            status=SimpleNamespace(conditions=[
+                SimpleNamespace(type="Ready", status="True", reason="KubeletReady", message="") if i >= not_ready_nodes
+                else SimpleNamespace(type="Ready", status="False", reason="KubeletNotReady", message="PLEG is not healthy")
+            ]),
+            spec=SimpleNamespace(unschedulable=False),
+        )
+        for i in range(n_nodes)
+    ]
+
+    pods = []
+    pod_states = []
+    usage = {}
+    cpu_limit, memory_limit = 500, 512
+    for i in range(n_pods):
+        state = rng.choices(states, weights)[0]
+        restarts = rng.randint(6, 60) if state in ("CrashLoopBackOff", "OOMKilled") else rng.choice((0, 0, 0, 1, 2))
+        if n_nodes and i % n_nodes < not_ready_nodes:
+            state, restarts = "CrashLoopBackOff", max(restarts, 6)
+        scheduled = state not in ("Pending",)
+        pods.append(SimpleNamespace(
+            metadata=SimpleNamespace(
+                name=f"app-{i // 10}-{i:06d}",
+                namespace=namespace,
+                creation_timestamp=now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                uid=f"uid-{i:06d}",
+            ),
+            spec=SimpleNamespace(
+                node_name=nodes[i % n_nodes].metadata.name if scheduled and nodes else None,
+                containers=[SimpleNamespace(name="app", resources=SimpleNamespace(
+                    limits={"cpu": f"{cpu_limit}m", "memory": f"{memory_limit}Mi"},
+                    requests={"cpu": "100m", "memory": "128Mi"},
+                ))],
+            ),
+            status=SimpleNamespace(
+                phase=_phase_for(state),
+                container_statuses=[_container_status(state, restarts)] if scheduled else None,
+            ),
+        ))
+        pod_states.append(state)
+        if scheduled and state != "Failed":
+            # OOMKilled pods run close to their memory limit
+            memory_fraction = rng.uniform(0.85, 0.99) if state == "OOMKilled" else rng.uniform(0.1, 0.7)
+            usage[pods[-1].metadata.name] = (int(rng.uniform(0.05, 0.95) * cpu_limit), int(memory_fraction * memory_limit))
+
+    events = []
+    for j in range(n_events):
+        idx = rng.randrange(n_pods) if n_pods else 0
+        state = pod_states[idx] if n_pods else "Running"
+        event_type, reason, message = EVENT_TEMPLATES[state]
+        first = now - timedelta(minutes=rng.randint(1, 120))
+        events.append(SimpleNamespace(
+            metadata=SimpleNamespace(name=f"event-{j:06d}", namespace=namespace),
+            type=event_type,
+            reason=reason,
+            message=message,
+            involved_object=SimpleNamespace(kind="Pod", name=pods[idx].metadata.name if n_pods else "none", namespace=namespace),
+            first_timestamp=first,
+            last_timestamp=first + timedelta(minutes=rng.randint(0, 60)),
+            count=rng.randint(1, 50),
+        ))
+
+    return FakeCluster(pods, events, nodes, namespace, usage)
+
+class _FakeLogResponse:
+    """Mimics the urllib3 response returned with ``_preload_content=False``"""
+
+    def __init__(self, lines: List[str], delay: float):
+        self._lines = lines
+        self._delay = delay
+
+    def stream(self, amt=None, decode_content=False):
+        for line in self._lines:
+            if self._delay:
+                time.sleep(self._delay)
+            yield (line + "\n").encode("utf8")
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+class FakeCoreV1Api:
+    """Stand-in for ``kubernetes.client.CoreV1Api`` backed by a ``FakeCluster``.
+
+    ``latency`` adds a blocking sleep to every call, mirroring the real
+    synchronous client; when ``error`` is set every call raises it after
+    the sleep (e.g. a urllib3 ``MaxRetryError`` for an unreachable apiserver).
+    """
+
+    def __init__(self, cluster: FakeCluster, latency: float = 0.0, log_lines: int = 200):
+        self.cluster = cluster
+        self.latency = latency
+        self.error: Optional[Exception] = None
+        self.log_lines = log_lines
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+
+    def list_namespace(self, limit: Optional[int] = None, **kwargs):
+        self._sleep()
+        return SimpleNamespace(items=[SimpleNamespace(metadata=SimpleNamespace(name=self.cluster.namespace))])
+
+    def list_namespaced_pod(self, namespace: str, **kwargs):
+        self._sleep()
+        return SimpleNamespace(items=[p for p in self.cluster.pods if p.metadata.namespace == namespace])
+
+    def list_namespaced_event(self, namespace: str, **kwargs):
+        self._sleep()
+        return SimpleNamespace(items=[e for e in self.cluster.events if e.metadata.namespace == namespace])
+
+    def list_node(self, **kwargs):
+        self._sleep()
+        return SimpleNamespace(items=list(self.cluster.nodes))
+
+    def read_namespaced_pod_log(self, name: str, namespace: str, **kwargs):
+        """Read log of the specified pod.
+
+        :param bool follow: Follow the log stream of the pod.
+        """
+        self._sleep()
+        lines = [f"{name} log line {i}" for i in range(self.log_lines)]
+        if kwargs.get("_preload_content", True):
+            return "\n".join(lines)
+        return _FakeLogResponse(lines, delay=0.0)
+
+class FakeCustomObjectsApi:
+    """Stand-in for ``CustomObjectsApi`` serving metrics.k8s.io pod usage"""
+
+    def __init__(self, cluster: FakeCluster, latency: float = 0.0):
+        self.cluster = cluster
+        self.latency = latency
+        self.error: Optional[Exception] = None
+
+    def list_namespaced_custom_object(self, group: str, version: str, namespace: str, plural: str, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        if namespace != self.cluster.namespace:
+            return {"items": []}
+        return {
+            "kind": "PodMetricsList",
+            "apiVersion": f"{group}/{version}",
+            "items": [
+                {
+                    "metadata": {"name": name, "namespace": namespace},
+                    "containers": [{"name": "app", "usage": {"cpu": f"{cpu * 1000000}n", "memory": f"{memory * 1024}Ki"}}],
+                }
+                for name, (cpu, memory) in self.cluster.usage.items()
+            ],
+        }
+
+def install_fake_cluster(k8s_client, cluster: FakeCluster, latency: float = 0.0, cluster_name: str = "fake-cluster"):
+    """Point a ``KubernetesClient`` at a fake cluster instead of a live EKS API"""
+    k8s_client.v1 = FakeCoreV1Api(cluster, latency=latency)
+    k8s_client.usage_collector.custom_api = FakeCustomObjectsApi(cluster, latency=latency)
+    k8s_client.usage_collector.invalidate()
+    k8s_client.node_collector.v1 = k8s_client.v1
+    k8s_client.node_collector.invalidate()
+    k8s_client.current_cluster = cluster_name
+    return k8s_client.v1
@@ -0,0 +1,212 @@
+"""Fault injection: analyses against a slow, hung or unreachable Kubernetes API.
+
+Fires bursts of concurrent live analyses (refresh=true) in five phases:
+healthy; degraded (every fake API call, and with --slow-rag every RAG
+query, stalls for --slow-latency seconds); open (same fault, breaker
+already open); recovered; and unreachable (every API call raises a urllib3
+MaxRetryError). For each phase it reports status codes, p50/p99/max
+latency, peak dependency calls in flight, peak threads and RSS, and the
+circuit breaker states from /api/health.
+
+It then checks the expected behaviour and exits non-zero on a violation:
+no 5xx or dropped requests in any phase, latency bounded by
+REQUEST_TIMEOUT while the API hangs, in-flight calls bounded by
+K8S_MAX_CONCURRENCY, the breaker opening under the fault and closing
+again after recovery (with --slow-rag, the rag breaker opening as well).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+from urllib3.exceptions import MaxRetryError
+
+from fake_cluster import generate_cluster, install_fake_cluster, parse_failure_mix
+from run_benchmark import current_rss_mb, free_port, percentile, start_server
+
+class Sampler:
+    """Peak in-flight calls, threads and RSS while a phase runs"""
+
+    def __init__(self, k8s_client, rag):
+        self.k8s_client = k8s_client
+        self.rag = rag
+        self.in_flight = self.threads = 0
+        self.rss = 0.0
+        self.breaker_opened = self.rag_breaker_opened = False
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            self.in_flight = max(self.in_flight, self.k8s_client.api.in_flight)
+            self.breaker_opened = self.breaker_opened or self.k8s_client.api.breaker.state != "closed"
+            self.rag_breaker_opened = self.rag_breaker_opened or self.rag.dependency.breaker.state != "closed"
+            self.threads = max(self.threads, threading.active_count())
+            self.rss = max(self.rss, current_rss_mb())
+            await asyncio.sleep(0.05)
+
+async def analyze(client: httpx.AsyncClient, namespace: str):
+    start = time.perf_counter()
+    try:
+        response = await client.post("/api/analyze", json={"namespace": namespace, "refresh": True})
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    return status, time.perf_counter() - start
+
+async def run_phase(name: str, port: int, namespace: str, burst: int, k8s_client, rag) -> Dict[str, Any]:
+    sampler = Sampler(k8s_client, rag)
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300) as client:
+        monitor = asyncio.create_task(sampler.run(stop))
+        results = await asyncio.gather(*(analyze(client, namespace) for _ in range(burst)))
+        stop.set()
+        await monitor
+        health = (await client.get("/api/health")).json()
+    latencies = [latency for _, latency in results]
+    statuses = Counter(str(status) for status, _ in results)
+    breakers = ", ".join(f"{dep}={s['state']}" for dep, s in health.get("dependencies", {}).items())
+    print(f"{name:<12}{percentile(latencies, 50) * 1000:>10.0f}{percentile(latencies, 99) * 1000:>10.0f}"
+          f"{max(latencies) * 1000:>10.0f}{sampler.in_flight:>10}{sampler.threads:>9}{sampler.rss:>9.1f}"
+          f"  {dict(statuses)}  {breakers}")
+    return {
+        "name": name,
+        "statuses": statuses,
+        "max_latency": max(latencies),
+        "in_flight": sampler.in_flight,
+        "breaker_opened": sampler.breaker_opened,
+        "rag_breaker_opened": sampler.rag_breaker_opened,
+        "breaker_state": k8s_client.api.breaker.state,
+    }
+
+def check_phases(phases: Dict[str, Dict[str, Any]], request_timeout: float, max_concurrency: int,
+                 slow_rag: bool = False) -> List[str]:
+    """Expected behaviour under the injected faults; returns the violations"""
+    failures = []
+    for phase in phases.values():
+        errors = {status: n for status, n in phase["statuses"].items() if not status.isdigit() or int(status) >= 500}
+        if errors:
+            failures.append(f"{phase['name']}: failed requests {errors}")
+        if phase["in_flight"] > max_concurrency:
+            failures.append(f"{phase['name']}: {phase['in_flight']} calls in flight, limit {max_concurrency}")
+    # Analysis CPU time comes on top of the deadline, so allow the healthy run's worst case
+    bound = request_timeout + phases["healthy"]["max_latency"]
+    for name in ("degraded", "open"):
+        if phases[name]["max_latency"] > bound:
+            failures.append(f"{name}: max latency {phases[name]['max_latency']:.1f}s exceeds {bound:.1f}s")
+    for name in ("degraded", "unreachable"):
+        if not phases[name]["breaker_opened"]:
+            failures.append(f"{name}: circuit breaker never opened")
+    if slow_rag and not phases["degraded"]["rag_breaker_opened"]:
+        failures.append("degraded: rag circuit breaker never opened")
+    if phases["recovered"]["breaker_state"] != "closed":
+        failures.append(f"recovered: circuit breaker is {phases['recovered']['breaker_state']}, expected closed")
+    return failures
+
+async def wait_idle(k8s_client, limit: float):
+    """Let calls stranded in threads by the hung phase finish"""
+    deadline = time.monotonic() + limit
+    while k8s_client.api.in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fault injection benchmark for dependency limits and breakers")
+    parser.add_argument("--pods", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--mix", default="CrashLoopBackOff=0.05,Pending=0.05,OOMKilled=0.02")
+    parser.add_argument("--burst", type=int, default=200, help="Concurrent analyses per phase")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="Seconds per fake API call when healthy")
+    parser.add_argument("--slow-latency", type=float, default=20.0, help="Seconds per call while degraded")
+    parser.add_argument("--slow-rag", action="store_true", help="Also stall every RAG query while degraded")
+    parser.add_argument("--request-timeout", type=float, default=5.0)
+    parser.add_argument("--call-timeout", type=float, default=2.0)
+    parser.add_argument("--reset-timeout", type=float, default=3.0)
+    args = parser.parse_args()
+
+    # Settings are read at import time
+    os.environ.setdefault("REQUEST_TIMEOUT", str(args.request_timeout))
+    os.environ.setdefault("K8S_CALL_TIMEOUT", str(args.call_timeout))
+    os.environ.setdefault("RAG_CALL_TIMEOUT", str(args.call_timeout))
+    os.environ.setdefault("BREAKER_RESET_TIMEOUT", str(args.reset_timeout))
+    os.environ.setdefault("ENABLE_SCHEDULER", "false")
+    os.environ.setdefault("ENABLE_HISTORY", "false")
+    os.chdir(APP_DIR)
+    os.makedirs("static", exist_ok=True)
+    import main as app_main
+
+    k8s_client = app_main.k8s_client
+    cluster = generate_cluster(n_pods=args.pods, n_events=args.events, failure_mix=parse_failure_mix(args.mix))
+    install_fake_cluster(k8s_client, cluster, latency=args.api_latency)
+    # Metrics and node lists cache; expire them so every phase hits the API
+    k8s_client.usage_collector.ttl = k8s_client.node_collector.ttl = 0
+
+    rag = app_main.ai_analyzer.rag_kb
+    rag_delay = {"seconds": 0.0}
+    original_query = rag._query
+
+    def stalled_query(query, n_results):
+        if rag_delay["seconds"]:
+            time.sleep(rag_delay["seconds"])
+        return original_query(query, n_results)
+    rag._query = stalled_query
+
+    def set_latency(seconds: float):
+        k8s_client.v1.latency = seconds
+        k8s_client.usage_collector.custom_api.latency = seconds
+
+    def set_error(error):
+        k8s_client.v1.error = error
+        k8s_client.usage_collector.custom_api.error = error
+
+    port = free_port()
+    server = start_server(app_main.app, port)
+    print(f"{args.pods} pods, bursts of {args.burst} analyses; REQUEST_TIMEOUT={app_main.settings.REQUEST_TIMEOUT}s "
+          f"K8S_CALL_TIMEOUT={app_main.settings.K8S_CALL_TIMEOUT}s "
+          f"K8S_MAX_CONCURRENCY={app_main.settings.K8S_MAX_CONCURRENCY}")
+    print(f"{'phase':<12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'in flight':>10}{'threads':>9}{'RSS MB':>9}  statuses  breakers")
+
+    async def scenario() -> Dict[str, Dict[str, Any]]:
+        phases = {}
+
+        async def phase(name: str):
+            phases[name] = await run_phase(name, port, cluster.namespace, args.burst, k8s_client, rag)
+
+        await phase("healthy")
+        set_latency(args.slow_latency)
+        if args.slow_rag:
+            rag_delay["seconds"] = args.slow_latency
+        await phase("degraded")
+        await phase("open")
+        set_latency(args.api_latency)
+        rag_delay["seconds"] = 0.0
+        await wait_idle(k8s_client, args.slow_latency + 1)
+        await asyncio.sleep(args.reset_timeout)
+        await phase("recovered")
+        set_error(MaxRetryError(None, "/api/v1/namespaces", "connection refused"))
+        await phase("unreachable")
+        set_error(None)
+        return phases
+
+    try:
+        phases = asyncio.run(scenario())
+    finally:
+        server.should_exit = True
+
+    failures = check_phases(phases, app_main.settings.REQUEST_TIMEOUT, app_main.settings.K8S_MAX_CONCURRENCY,
+                            slow_rag=args.slow_rag)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: no failed requests, bounded latency and in-flight calls, breaker opened and closed")
+
+if __name__ == "__main__":
+    main()
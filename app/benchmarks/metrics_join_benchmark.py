@@ -0,0 +1,67 @@
+"""Benchmark the metrics-server usage join at 10k pods.
+
+Uses FakeCustomObjectsApi as a local metrics.k8s.io and reports the cost
+of building the name index, joining usage onto PodRecords, and a full
+get_pods call with a cold and a warm usage cache.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_cluster import generate_cluster, install_fake_cluster
+from kubernetes_client import KubernetesClient
+from resource_metrics import PodMetricsCollector, pod_limits
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="metrics-server join benchmark")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    namespace = "default"
+    cluster = generate_cluster(n_pods=args.pods, n_events=0, namespace=namespace)
+    k8s = KubernetesClient()
+    install_fake_cluster(k8s, cluster)
+    collector = k8s.usage_collector
+
+    raw = collector.custom_api.list_namespaced_custom_object("metrics.k8s.io", "v1beta1", namespace, "pods")
+    index = PodMetricsCollector._build_index(raw["items"])
+    pods = cluster.pods
+    records = asyncio.run(k8s.get_pods(namespace))
+
+    def cold():
+        collector.invalidate()
+        asyncio.run(k8s.get_pods(namespace))
+
+    def warm():
+        asyncio.run(k8s.get_pods(namespace))
+
+    results = [
+        ("build name index", timed(lambda: PodMetricsCollector._build_index(raw["items"]), args.repeat)),
+        ("pod limits", timed(lambda: [pod_limits(p) for p in pods], args.repeat)),
+        ("hash join", timed(lambda: PodMetricsCollector.join(records, [pod_limits(p) for p in pods], index), args.repeat)),
+        ("get_pods, cold usage cache", timed(cold, args.repeat)),
+        ("get_pods, warm usage cache", timed(warm, args.repeat)),
+    ]
+
+    flagged = sum(1 for r in records if (r.memory_percent or 0) >= 80)
+    print(f"{args.pods} pods, {len(index)} usage samples, {flagged} pods >= 80% memory; best of {args.repeat}")
+    for name, ms in results:
+        print(f"{name:<30}{ms:>10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark node correlation on a namespace with a few bad nodes.
+
+Generates N pods over M nodes, K of them NotReady with every pod on them
+crash looping, and reports the cost of pod detection versus the node
+index + node rules, and how many issues fold into node root causes.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_cluster import FakeCoreV1Api, generate_cluster
+from ai_analyzer import AIAnalyzer
+from kubernetes_client import KubernetesClient
+
+def main():
+    parser = argparse.ArgumentParser(description="Node correlation benchmark")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--not-ready", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cluster = generate_cluster(n_pods=args.pods, n_events=0, n_nodes=args.nodes, not_ready_nodes=args.not_ready)
+    k8s = KubernetesClient()
+    k8s.v1 = k8s.node_collector.v1 = FakeCoreV1Api(cluster)
+    analyzer = AIAnalyzer()
+
+    pods = asyncio.run(k8s.get_pods("default"))
+    nodes = asyncio.run(k8s.get_nodes())
+
+    detect = correlate = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        issues = analyzer.detect_issues(pods, [], namespace="default")
+        detect = min(detect, time.perf_counter() - start)
+        start = time.perf_counter()
+        folded, root_causes = analyzer.detect_node_issues(nodes, pods, issues, "default")
+        correlate = min(correlate, time.perf_counter() - start)
+
+    print(f"{args.pods} pods on {args.nodes} nodes ({args.not_ready} NotReady), best of {args.repeat}")
+    print(f"pod detection       {detect * 1000:8.1f} ms  {len(issues):>6} issues")
+    print(f"node correlation    {correlate * 1000:8.1f} ms  {len(folded):>6} issues after folding")
+    for cause in root_causes:
+        print(f"  {cause.node}: {', '.join(i.type for i in cause.issues)}; "
+              f"{cause.folded_issues} pod issues on {len(cause.affected_pods)} pods folded")
+
+if __name__ == "__main__":
+    main()
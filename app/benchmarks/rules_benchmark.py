@@ -0,0 +1,86 @@
+"""Benchmark rule evaluation as the rule count grows.
+
+Generates N extra synthetic rules (keyed on event reasons and pod phases,
+like typical in-house rules) on top of the built-in set and times
+AIAnalyzer-style detection over a synthetic namespace.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_cluster import generate_cluster
+from models import PodRecord
+from rule_engine import RuleEngine, DEFAULT_RULES_PATH
+
+def synthetic_rules(n: int):
+    rules = []
+    for i in range(n):
+        if i % 2:
+            rules.append({
+                "id": f"inhouse-event-{i}",
+                "target": "event",
+                "match": {"reason": {"contains": f"Custom{i}"}, "type": "Warning"},
+                "issue": {"type": f"InHouseEvent{i}", "severity": "medium", "description": "{message}"},
+            })
+        else:
+            rules.append({
+                "id": f"inhouse-pod-{i}",
+                "target": "pod",
+                "match": {"status": "Unknown", "restarts": {"gt": i}},
+                "issue": {"type": f"InHousePod{i}", "severity": "low"},
+            })
+    return rules
+
+def to_inputs(cluster):
+    pods = [
+        PodRecord(p.metadata.name, p.metadata.namespace, p.status.phase, "1/1",
+                  sum(cs.restart_count for cs in (p.status.container_statuses or [])), "1d",
+                  p.spec.node_name or "N/A", None, None, None, None)
+        for p in cluster.pods
+    ]
+    events = [
+        {"type": e.type, "reason": e.reason, "message": e.message,
+         "object": f"Pod/{e.involved_object.name}", "namespace": e.metadata.namespace, "count": e.count}
+        for e in cluster.events
+    ]
+    return pods, events
+
+def run(engine: RuleEngine, pods, events, repeat: int) -> float:
+    ruleset = engine.ruleset
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for pod in pods:
+            ruleset.evaluate("pod", pod, "default")
+        for event in events:
+            ruleset.evaluate("event", event, "default")
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule engine scaling benchmark")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pods, events = to_inputs(generate_cluster(n_pods=args.pods, n_events=args.events))
+    print(f"{args.pods} pods, {args.events} events, best of {args.repeat}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for extra in (0, 50, 200):
+            path = os.path.join(tmp, f"extra_{extra}.yaml")
+            with open(path, "w") as f:
+                yaml.safe_dump({"rules": synthetic_rules(extra)}, f)
+            engine = RuleEngine([DEFAULT_RULES_PATH, path], reload_interval=3600)
+            print(f"{len(engine.ruleset.rules):>4} rules  {run(engine, pods, events, args.repeat):>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
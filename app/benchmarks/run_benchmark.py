@@ -0,0 +1,183 @@
+"""Drive the API against a synthetic cluster and report throughput and latency.
+
+Example:
+    python benchmarks/run_benchmark.py --pods 5000 --events 2000 \\
+        --concurrency 16 --requests 200 --mix "CrashLoopBackOff=0.05,Pending=0.02"
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import uvicorn
+import websockets
+
+from fake_cluster import generate_cluster, install_fake_cluster, parse_failure_mix
+
+# "analyze" is a live run (refresh=true); "stored" is /api/analyze served from the results store
+ENDPOINTS = ("analyze", "stored", "pods", "rag", "logs")
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux and bytes on macOS; only a fallback
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def _http_call(client: httpx.AsyncClient, endpoint: str, namespace: str):
+    if endpoint == "analyze":
+        response = await client.post("/api/analyze", json={"namespace": namespace, "refresh": True})
+    elif endpoint == "stored":
+        response = await client.post("/api/analyze", json={"namespace": namespace})
+    elif endpoint == "pods":
+        response = await client.get(f"/api/pods/{namespace}")
+    else:
+        response = await client.get("/api/rag/query", params={"q": "pod crashloopbackoff oomkilled", "limit": 3})
+    response.raise_for_status()
+    return len(response.content)
+
+async def _ws_call(base_ws: str, namespace: str, pod_name: str):
+    size = 0
+    async with websockets.connect(f"{base_ws}/ws/logs/{namespace}/{pod_name}") as ws:
+        try:
+            async for message in ws:
+                size += len(message)
+        except websockets.ConnectionClosed:
+            pass
+    return size
+
+async def run_endpoint(endpoint: str, port: int, namespace: str, pod_name: str,
+                       concurrency: int, total: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    bytes_received = 0
+    errors = 0
+    remaining = iter(range(total))
+    rss_before = current_rss_mb()
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+        async def worker():
+            nonlocal bytes_received, errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    if endpoint == "logs":
+                        bytes_received += await _ws_call(f"ws://127.0.0.1:{port}", namespace, pod_name)
+                    else:
+                        bytes_received += await _http_call(client, endpoint, namespace)
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.mean(latencies) * 1000) if latencies else 0.0,
+        "kb_per_request": (bytes_received / len(latencies) / 1024) if latencies else 0.0,
+        "rss_mb": current_rss_mb(),
+        "rss_delta_mb": current_rss_mb() - rss_before,
+    }
+
+def print_report(results: Dict[str, Dict[str, float]]):
+    header = f"{'endpoint':<10}{'ok':>7}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'KB/req':>10}{'RSS MB':>10}{'ΔRSS':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in results.items():
+        print(f"{endpoint:<10}{r['requests']:>7}{r['errors']:>6}{r['throughput']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['kb_per_request']:>10.1f}"
+              f"{r['rss_mb']:>10.1f}{r['rss_delta_mb']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the troubleshooter against a synthetic cluster")
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--mix", default=None, help='Failure mix, e.g. "CrashLoopBackOff=0.05,Pending=0.02"')
+    parser.add_argument("--namespace", default="default")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds of latency added to each fake API call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    args = parser.parse_args()
+
+    # No background analyses competing for the fake API; "stored" reads what "analyze" saved
+    os.environ.setdefault("ENABLE_SCHEDULER", "false")
+    # main.py resolves templates/ and static/ relative to the working directory
+    os.chdir(APP_DIR)
+    os.makedirs("static", exist_ok=True)
+    import main as app_main
+
+    cluster = generate_cluster(
+        n_pods=args.pods,
+        n_events=args.events,
+        failure_mix=parse_failure_mix(args.mix) if args.mix else None,
+        namespace=args.namespace,
+        n_nodes=args.nodes,
+    )
+    install_fake_cluster(app_main.k8s_client, cluster, latency=args.api_latency)
+
+    port = free_port()
+    server = start_server(app_main.app, port)
+    pod_name = cluster.pods[0].metadata.name if cluster.pods else "missing"
+
+    print(f"Synthetic cluster: {args.pods} pods, {args.events} events, {args.nodes} nodes; "
+          f"concurrency={args.concurrency}, requests/endpoint={args.requests}")
+    results = {}
+    try:
+        for endpoint in args.endpoints.split(","):
+            endpoint = endpoint.strip()
+            if endpoint not in ENDPOINTS:
+                parser.error(f"Unknown endpoint: {endpoint}")
+            results[endpoint] = asyncio.run(run_endpoint(
+                endpoint, port, args.namespace, pod_name, args.concurrency, args.requests
+            ))
+    finally:
+        server.should_exit = True
+
+    print_report(results)
+
+if __name__ == "__main__":
+    main()
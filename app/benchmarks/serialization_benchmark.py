@@ -0,0 +1,82 @@
+"""Compare pod list serialization paths at 10k pods.
+
+Measures building the pod list from API objects and encoding the
+/api/pods response body with:
+  * legacy dict records + jsonable_encoder + json.dumps (previous behaviour)
+  * PodRecord + orjson (FastJSONResponse)
+  * PodRecord + orjson with ?fields=name,status
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+from fake_cluster import generate_cluster, install_fake_cluster
+from kubernetes_client import KubernetesClient
+from serialization import dumps, select_fields
+
+def legacy_get_pods(k8s: KubernetesClient, namespace: str):
+    """The original dict-per-pod implementation, kept here as a baseline"""
+    pods = k8s.v1.list_namespaced_pod(namespace=namespace)
+    pod_list = []
+    for pod in pods.items:
+        pod_list.append({
+            "name": pod.metadata.name,
+            "namespace": pod.metadata.namespace,
+            "status": pod.status.phase,
+            "ready": k8s._get_ready_status(pod),
+            "restarts": k8s._get_restart_count(pod),
+            "age": k8s._calculate_age(pod.metadata.creation_timestamp, datetime.now(timezone.utc)),
+            "node": pod.spec.node_name or "N/A"
+        })
+    return pod_list
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Pod serialization benchmark")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    namespace = "default"
+    k8s = KubernetesClient()
+    install_fake_cluster(k8s, generate_cluster(n_pods=args.pods, n_events=0, namespace=namespace))
+    fields = ["name", "status"]
+
+    def legacy():
+        pods = legacy_get_pods(k8s, namespace)
+        return json.dumps(jsonable_encoder({"pods": pods, "namespace": namespace, "count": len(pods)})).encode()
+
+    def fast():
+        pods = asyncio.run(k8s.get_pods(namespace))
+        return dumps({"pods": pods, "namespace": namespace, "count": len(pods)})
+
+    def fast_fields():
+        pods = asyncio.run(k8s.get_pods(namespace))
+        return dumps({"pods": select_fields(pods, fields), "namespace": namespace, "count": len(pods)})
+
+    print(f"{args.pods} pods, best of {args.repeat}")
+    print(f"{'path':<32}{'ms':>10}{'KB':>10}")
+    for name, fn in (("dict + jsonable_encoder", legacy), ("PodRecord + orjson", fast),
+                     ("PodRecord + orjson, fields=2", fast_fields)):
+        size = len(fn()) / 1024
+        print(f"{name:<32}{best_of(fn, args.repeat) * 1000:>10.1f}{size:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare time to first byte of /api/analyze and /api/analyze/stream.
+
+Runs live analyses (refresh=true) against a synthetic cluster and reports,
+for the buffered endpoint and the NDJSON stream, the time to the first
+byte, to the first issue record and to the complete response.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+import orjson
+
+from fake_cluster import generate_cluster, install_fake_cluster, parse_failure_mix
+from run_benchmark import free_port, percentile, start_server
+
+async def buffered(client: httpx.AsyncClient, namespace: str):
+    start = time.perf_counter()
+    async with client.stream("POST", "/api/analyze", json={"namespace": namespace, "refresh": True}) as response:
+        first_byte = None
+        async for _ in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    total = time.perf_counter() - start
+    # The whole body arrives at once, so the first issue is only usable at the end
+    return first_byte, total, total
+
+async def streamed(client: httpx.AsyncClient, namespace: str):
+    start = time.perf_counter()
+    first_byte = first_issue = None
+    async with client.stream("GET", f"/api/analyze/stream/{namespace}") as response:
+        async for line in response.aiter_lines():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            if first_issue is None and line and orjson.loads(line)["type"] == "issue":
+                first_issue = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return first_byte, first_issue if first_issue is not None else total, total
+
+async def run(port: int, namespace: str, requests: int):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300) as client:
+        for name, call in (("buffered", buffered), ("stream", streamed)):
+            samples = [await call(client, namespace) for _ in range(requests)]
+            columns = list(zip(*samples))
+            print(f"{name:<10}" + "".join(f"{percentile(list(c), 50) * 1000:>14.1f}" for c in columns))
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming analysis time-to-first-byte benchmark")
+    parser.add_argument("--pods", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--mix", default="CrashLoopBackOff=0.05,Pending=0.05,OOMKilled=0.02")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="Seconds added to each fake API call")
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    os.chdir(APP_DIR)
+    os.makedirs("static", exist_ok=True)
+    import main as app_main
+
+    cluster = generate_cluster(n_pods=args.pods, n_events=args.events, failure_mix=parse_failure_mix(args.mix))
+    install_fake_cluster(app_main.k8s_client, cluster, latency=args.api_latency)
+    port = free_port()
+    server = start_server(app_main.app, port)
+    print(f"{args.pods} pods, {args.events} events, {args.api_latency * 1000:.0f} ms per API call; p50 of {args.requests}")
+    print(f"{'endpoint':<10}{'first byte ms':>14}{'first issue ms':>14}{'complete ms':>14}")
+    try:
+        asyncio.run(run(port, cluster.namespace, args.requests))
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
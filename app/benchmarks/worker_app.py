@@ -0,0 +1,23 @@
+"""ASGI entry point for workers_benchmark.py: the real app on a fake cluster.
+
+gunicorn imports this in the master (preload_app), so every forked worker
+inherits the same synthetic cluster. Sized through BENCH_* variables.
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(APP_DIR)
+
+from fake_cluster import generate_cluster, install_fake_cluster, parse_failure_mix
+import main
+
+cluster = generate_cluster(
+    n_pods=int(os.environ.get("BENCH_PODS", "1000")),
+    n_events=int(os.environ.get("BENCH_EVENTS", "500")),
+    failure_mix=parse_failure_mix(os.environ["BENCH_MIX"]) if os.environ.get("BENCH_MIX") else None,
+)
+install_fake_cluster(main.k8s_client, cluster, latency=float(os.environ.get("BENCH_API_LATENCY", "0")))
+app = main.app
@@ -0,0 +1,150 @@
+"""Measure throughput scaling from 1 to N gunicorn workers.
+
+Each round starts ``gunicorn -c gunicorn.conf.py`` with the fake cluster
+preloaded (worker_app.py), drives live analyses (refresh=true) and pod
+listings at a fixed concurrency, and reports throughput, latency and
+memory. PSS splits shared pages between processes, so the per-worker
+figure shows how much of the preloaded model stays shared.
+
+Example:
+    python benchmarks/workers_benchmark.py --workers 1,2,4 --pods 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+
+from run_benchmark import free_port, percentile
+
+def pss_mb(pid: int) -> float:
+    """Proportional set size of a process in MB (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+def start_gunicorn(workers: int, port: int, tmp: str, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WORKERS=str(workers), HOST="127.0.0.1", PORT=str(port),
+        STATE_BACKEND=f"local://{tmp}/state-{workers}.db",
+        RESULTS_DB_PATH=f"{tmp}/analysis-{workers}.db",
+        ENABLE_SCHEDULER="false", ENABLE_HISTORY="false",
+        BENCH_PODS=str(args.pods), BENCH_EVENTS=str(args.events),
+        BENCH_API_LATENCY=str(args.api_latency),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--pythonpath", BENCH_DIR,
+         "--log-level", "warning", "worker_app:app"],
+        cwd=APP_DIR, env=env
+    )
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health/live", timeout=1).status_code == 200:
+                # Give the remaining workers a moment to finish booting
+                time.sleep(2)
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become ready")
+
+async def drive(port: int, endpoint: str, concurrency: int, total: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    if endpoint == "analyze":
+                        response = await client.post("/api/analyze", json={"namespace": "default", "refresh": True})
+                    else:
+                        response = await client.get("/api/pods/default")
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker scaling benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint per round")
+    parser.add_argument("--endpoints", default="analyze,pods")
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    header = f"{'workers':>8}{'endpoint':>10}{'req/s':>10}{'speedup':>9}{'p50 ms':>10}{'p99 ms':>10}{'err':>6}{'PSS/worker':>12}{'PSS total':>11}"
+    print(f"{args.pods} pods, {args.events} events, concurrency={args.concurrency}")
+    print(header)
+    print("-" * len(header))
+    baseline: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (int(w) for w in args.workers.split(",")):
+            port = free_port()
+            process = start_gunicorn(workers, port, tmp, args)
+            try:
+                for endpoint in args.endpoints.split(","):
+                    result = asyncio.run(drive(port, endpoint, args.concurrency, args.requests))
+                    baseline.setdefault(endpoint, result["throughput"])
+                    pids = child_pids(process.pid)
+                    worker_pss = [pss_mb(pid) for pid in pids]
+                    total_pss = pss_mb(process.pid) + sum(worker_pss)
+                    speedup = result["throughput"] / baseline[endpoint] if baseline[endpoint] else 0.0
+                    print(f"{workers:>8}{endpoint:>10}{result['throughput']:>10.1f}{speedup:>8.2f}x"
+                          f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>6}"
+                          f"{(sum(worker_pss) / len(worker_pss) if worker_pss else 0):>12.1f}{total_pss:>11.1f}")
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+if __name__ == "__main__":
+    main()
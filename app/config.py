@@ -10,6 +10,10 @@ class Settings:
     # Server settings
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    # Worker processes (gunicorn, see gunicorn.conf.py) and where they share state:
+    # memory:// (single worker), local://[path] (same host) or redis://host:port/db
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    STATE_BACKEND: str = os.getenv("STATE_BACKEND", "")
     
     # AWS settings
     AWS_REGION: str = os.getenv("AWS_REGION", "us-west-2")
@@ -20,10 +24,16 @@ class Settings:
     # Analysis settings
     MAX_PODS_PER_ANALYSIS: int = int(os.getenv("MAX_PODS_PER_ANALYSIS", "100"))
     MAX_EVENTS_PER_ANALYSIS: int = int(os.getenv("MAX_EVENTS_PER_ANALYSIS", "50"))
+    # Collapse repeated events per (object, reason) and ignore events older than the window (0 = no limit)
+    ENABLE_EVENT_COMPACTION: bool = os.getenv("ENABLE_EVENT_COMPACTION", "true").lower() == "true"
+    EVENT_WINDOW_MINUTES: float = float(os.getenv("EVENT_WINDOW_MINUTES", "60"))
     
     # Log streaming settings
     LOG_TAIL_LINES: int = int(os.getenv("LOG_TAIL_LINES", "100"))
     LOG_STREAM_TIMEOUT: int = int(os.getenv("LOG_STREAM_TIMEOUT", "300"))
+    # Concurrent log streams per worker; a stream ends after this many seconds without output
+    LOG_MAX_STREAMS: int = int(os.getenv("LOG_MAX_STREAMS", "10"))
+    LOG_READ_TIMEOUT: float = float(os.getenv("LOG_READ_TIMEOUT", "60"))
     
     # Security settings
     API_TOKEN: str = os.getenv("API_TOKEN", "")
@@ -34,9 +44,69 @@ class Settings:
     MEMORY_USAGE_THRESHOLD: float = float(os.getenv("MEMORY_USAGE_THRESHOLD", "80.0"))
     CPU_USAGE_THRESHOLD: float = float(os.getenv("CPU_USAGE_THRESHOLD", "80.0"))
     
+    # Time-series history for rate and trend detection
+    ENABLE_HISTORY: bool = os.getenv("ENABLE_HISTORY", "true").lower() == "true"
+    HISTORY_NAMESPACES: List[str] = os.getenv("HISTORY_NAMESPACES", "default").split(",")
+    HISTORY_SAMPLE_INTERVAL: float = float(os.getenv("HISTORY_SAMPLE_INTERVAL", "10"))
+    HISTORY_SAMPLES: int = int(os.getenv("HISTORY_SAMPLES", "90"))
+    RESTART_RATE_WINDOW: float = float(os.getenv("RESTART_RATE_WINDOW", "600"))
+    RESTART_RATE_THRESHOLD: int = int(os.getenv("RESTART_RATE_THRESHOLD", "3"))
+    MEMORY_TREND_HORIZON: float = float(os.getenv("MEMORY_TREND_HORIZON", "30"))
+    
+    # Detection rules: extra rule files/directories (comma-separated), checked for changes every N seconds
+    RULES_PATH: str = os.getenv("RULES_PATH", "")
+    RULES_RELOAD_INTERVAL: float = float(os.getenv("RULES_RELOAD_INTERVAL", "5"))
+    MAX_LOG_PODS_PER_ANALYSIS: int = int(os.getenv("MAX_LOG_PODS_PER_ANALYSIS", "10"))
+    
+    # Node analysis: node snapshot cache and failure concentration thresholds
+    ENABLE_NODE_ANALYSIS: bool = os.getenv("ENABLE_NODE_ANALYSIS", "true").lower() == "true"
+    NODE_CACHE_TTL: float = float(os.getenv("NODE_CACHE_TTL", "30"))
+    NODE_FAILURE_MIN_PODS: int = int(os.getenv("NODE_FAILURE_MIN_PODS", "3"))
+    NODE_FAILURE_PERCENT: float = float(os.getenv("NODE_FAILURE_PERCENT", "50"))
+    # Fold pod issues on a node with a node-level finding into one root cause
+    NODE_FOLD_POD_ISSUES: bool = os.getenv("NODE_FOLD_POD_ISSUES", "true").lower() == "true"
+    
+    # Scheduled analysis and results store
+    ENABLE_SCHEDULER: bool = os.getenv("ENABLE_SCHEDULER", "true").lower() == "true"
+    SCHEDULE_NAMESPACES: List[str] = os.getenv("SCHEDULE_NAMESPACES", "default").split(",")
+    SCHEDULE_INTERVAL: float = float(os.getenv("SCHEDULE_INTERVAL", "60"))
+    SCHEDULE_JITTER: float = float(os.getenv("SCHEDULE_JITTER", "0.1"))
+    SCHEDULE_CONCURRENCY: int = int(os.getenv("SCHEDULE_CONCURRENCY", "2"))
+    ANALYSIS_MAX_AGE: float = float(os.getenv("ANALYSIS_MAX_AGE", "120"))
+    RESULTS_DB_PATH: str = os.getenv("RESULTS_DB_PATH", "./data/analysis.db")
+    RESULTS_RETENTION_HOURS: float = float(os.getenv("RESULTS_RETENTION_HOURS", "72"))
+    RESULTS_MAX_RUNS_PER_NAMESPACE: int = int(os.getenv("RESULTS_MAX_RUNS_PER_NAMESPACE", "1000"))
+    
+    # Dependency limits: a request's overall deadline, and per dependency the concurrent calls,
+    # per-call timeout (seconds) and callers allowed to queue before failing fast
+    REQUEST_TIMEOUT: float = float(os.getenv("REQUEST_TIMEOUT", "30"))
+    K8S_MAX_CONCURRENCY: int = int(os.getenv("K8S_MAX_CONCURRENCY", "8"))
+    K8S_CALL_TIMEOUT: float = float(os.getenv("K8S_CALL_TIMEOUT", "10"))
+    RAG_MAX_CONCURRENCY: int = int(os.getenv("RAG_MAX_CONCURRENCY", "2"))
+    RAG_CALL_TIMEOUT: float = float(os.getenv("RAG_CALL_TIMEOUT", "5"))
+    DEPENDENCY_MAX_WAITING: int = int(os.getenv("DEPENDENCY_MAX_WAITING", "100"))
+    # Circuit breaker: consecutive failures that open it, seconds before a trial call
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT: float = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+    
+    # Resource usage (metrics-server)
+    ENABLE_METRICS_SERVER: bool = os.getenv("ENABLE_METRICS_SERVER", "true").lower() == "true"
+    METRICS_CACHE_TTL: float = float(os.getenv("METRICS_CACHE_TTL", "15"))
+    
     # RAG settings
     ENABLE_RAG: bool = os.getenv("ENABLE_RAG", "true").lower() == "true"
     KNOWLEDGE_BASE_PATH: str = os.getenv("KNOWLEDGE_BASE_PATH", "./knowledge_base")
+    # Chroma server shared by all workers; empty keeps the store in KNOWLEDGE_BASE_PATH
+    CHROMA_HOST: str = os.getenv("CHROMA_HOST", "")
+    CHROMA_PORT: int = int(os.getenv("CHROMA_PORT", "8000"))
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    
+    # Response settings
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    
+    # Profiling settings
+    ENABLE_PROFILING: bool = os.getenv("ENABLE_PROFILING", "false").lower() == "true"
+    PROFILE_OUTPUT_DIR: str = os.getenv("PROFILE_OUTPUT_DIR", "./profiles")
+    PROFILE_SAMPLE_INTERVAL: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,136 @@
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+import itertools
+import os
+import threading
+import time
+
+from models import PodRecord, POD_STATUS_FIELDS, POD_USAGE_FIELDS
+
+# Tombstones older than this many removals are dropped; clients further
+# behind than that receive a full pod list instead of a delta.
+MAX_TOMBSTONES = 10000
+
+# Low bits of every version identify the process that issued it, so a
+# version from another worker is never mistaken for one of ours.
+TAG_BITS = 10
+
+_status_key = attrgetter(*POD_STATUS_FIELDS)
+_usage_key = attrgetter(*POD_USAGE_FIELDS)
+
+class _NamespaceState:
+    __slots__ = ("version", "usage_version", "records", "tombstones", "horizon")
+
+    def __init__(self, horizon: int):
+        self.version = self.usage_version = horizon
+        self.records: Dict[str, Tuple[PodRecord, int]] = {}
+        self.tombstones: Dict[str, int] = {}
+        self.horizon = horizon
+
+class PodDeltaTracker:
+    """Tracks per-namespace pod list versions so clients can fetch only changes.
+
+    Every observed pod list is diffed against the previous one; pods whose
+    status fields changed are stamped with a new version and removed pods
+    leave a tombstone. Resource usage drifts on every metrics refresh, so it
+    only moves a separate usage version and never marks a pod as changed. Versions are monotonically increasing integers seeded from
+    the wall clock, so versions handed out by a previous process fall below
+    the horizon and get a full response. Each process tags its versions,
+    and versions from a sibling worker also get a full response.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count(int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, _NamespaceState] = {}
+        self._tag = None
+
+    def _check_process(self):
+        # The tag is taken lazily so forked workers each get their own
+        tag = os.getpid() % (1 << TAG_BITS)
+        if self._tag != tag:
+            self._tag = tag
+            self._namespaces.clear()
+
+    def _next_version(self) -> int:
+        return (next(self._counter) << TAG_BITS) | self._tag
+
+    def update(self, namespace: str, pods: List[PodRecord]) -> int:
+        """Record the latest pod list for a namespace and return its version"""
+        with self._lock:
+            self._check_process()
+            state = self._namespaces.get(namespace)
+            if state is None:
+                state = self._namespaces[namespace] = _NamespaceState(self._next_version())
+
+            version = None
+            usage_changed = False
+            seen = set()
+            records = state.records
+            for pod in pods:
+                seen.add(pod.name)
+                previous = records.get(pod.name)
+                if previous is not None:
+                    usage_changed = usage_changed or _usage_key(previous[0]) != _usage_key(pod)
+                    if _status_key(previous[0]) == _status_key(pod):
+                        # Keep the latest usage without bumping the version
+                        records[pod.name] = (pod, previous[1])
+                        continue
+                else:
+                    usage_changed = True
+                if version is None:
+                    version = self._next_version()
+                records[pod.name] = (pod, version)
+                state.tombstones.pop(pod.name, None)
+
+            removed = [name for name in records if name not in seen] if len(seen) != len(records) else []
+            if removed:
+                if version is None:
+                    version = self._next_version()
+                for name in removed:
+                    del records[name]
+                    state.tombstones[name] = version
+                self._prune(state)
+
+            if version is not None:
+                state.version = version
+            if usage_changed or removed:
+                state.usage_version = version if version is not None else self._next_version()
+            return state.version
+
+    def usage_version(self, namespace: str) -> Optional[int]:
+        """Version of the namespace's resource usage, moved by every change in it"""
+        with self._lock:
+            self._check_process()
+            state = self._namespaces.get(namespace)
+            return state.usage_version if state is not None else None
+
+    def _prune(self, state: _NamespaceState):
+        overflow = len(state.tombstones) - MAX_TOMBSTONES
+        if overflow <= 0:
+            return
+        # Dicts preserve insertion order, so the oldest tombstones come first
+        for name in list(itertools.islice(state.tombstones, overflow)):
+            state.horizon = max(state.horizon, state.tombstones.pop(name))
+
+    def stats(self) -> Dict[str, int]:
+        """Size of the tracked state, for status reporting"""
+        with self._lock:
+            return {
+                "namespaces": len(self._namespaces),
+                "pods": sum(len(state.records) for state in self._namespaces.values())
+            }
+
+    def delta(self, namespace: str, since: int) -> Optional[Dict[str, Any]]:
+        """Return pods changed and removed after ``since``, or None if a full list is needed"""
+        with self._lock:
+            self._check_process()
+            state = self._namespaces.get(namespace)
+            if state is None or since < state.horizon or since > state.version:
+                return None
+            if since & ((1 << TAG_BITS) - 1) != self._tag:
+                return None
+            return {
+                "changed": [record for record, version in state.records.values() if version > since],
+                "removed": [name for name, version in state.tombstones.items() if version > since],
+            }
@@ -0,0 +1,43 @@
+"""Gunicorn settings for running several workers.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app), so the embedding
+model is loaded before the fork and its memory is shared copy-on-write by
+every worker. Per-process resources (SQLite connections, the vector store,
+background tasks) are opened after the fork. Workers share connection
+state and caches through STATE_BACKEND.
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+from config import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+# Aggregate Prometheus metrics across workers; must be set before the app is imported
+if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+def when_ready(server):
+    # Runs in the master after preload and before forking: move everything
+    # loaded so far out of the collector's reach so GC passes in the workers
+    # do not write to (and un-share) those pages
+    gc.freeze()
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def on_exit(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+    if directory.startswith(os.path.join(tempfile.gettempdir(), "prometheus-")):
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,258 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+from config import settings
+from shared_state import StateBackend, run_as_leader
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+PHASES = ("Unknown", "Pending", "Running", "Succeeded", "Failed")
+_PHASE_CODES = {phase: code for code, phase in enumerate(PHASES)}
+
+class PodSeries:
+    """Fixed-size ring buffer of samples for one pod, backed by typed arrays.
+
+    Memory per pod is constant: capacity * (8 + 8 + 1 + 4 + 4) bytes plus
+    a small fixed overhead, regardless of how long the pod lives. Running
+    least-squares sums over the buffered memory samples make the trend
+    query O(1).
+    """
+    __slots__ = ("capacity", "head", "size", "origin", "times", "restarts", "phases", "cpu", "memory",
+                 "_n", "_st", "_sm", "_stt", "_stm", "_recompute_at")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.head = 0  # index of the next write
+        self.size = 0
+        self.origin = None  # times are stored relative to the first sample
+        self.times = array("d", bytes(8 * capacity))
+        self.restarts = array("q", bytes(8 * capacity))
+        self.phases = array("b", bytes(capacity))
+        self.cpu = array("f", bytes(4 * capacity))
+        self.memory = array("f", bytes(4 * capacity))
+        self._n = 0
+        self._st = self._sm = self._stt = self._stm = 0.0
+        # Spread the periodic exact recompute across pods rather than all on one tick
+        self._recompute_at = id(self) % capacity
+
+    def append(self, timestamp: float, restarts: int, phase: str,
+               cpu_percent: Optional[float], memory_percent: Optional[float]):
+        if self.origin is None:
+            self.origin = timestamp
+        i = self.head
+        if self.size == self.capacity:
+            self._remove_point(self.times[i], self.memory[i])
+        t = timestamp - self.origin
+        self.times[i] = t
+        self.restarts[i] = restarts
+        self.phases[i] = _PHASE_CODES.get(phase, 0)
+        self.cpu[i] = NAN if cpu_percent is None else cpu_percent
+        self.memory[i] = NAN if memory_percent is None else memory_percent
+        self._add_point(t, self.memory[i])
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        if self.head == self._recompute_at and self.size == self.capacity:
+            self._recompute_sums()
+
+    def _add_point(self, t: float, m: float):
+        if m == m:  # not NaN
+            self._n += 1
+            self._st += t
+            self._sm += m
+            self._stt += t * t
+            self._stm += t * m
+
+    def _remove_point(self, t: float, m: float):
+        if m == m:
+            self._n -= 1
+            self._st -= t
+            self._sm -= m
+            self._stt -= t * t
+            self._stm -= t * m
+
+    def _recompute_sums(self):
+        """Once per lap, rebase times on the oldest sample and recompute the sums exactly
+
+        Keeps relative times small and sheds floating point drift from the
+        incremental add/remove updates.
+        """
+        shift = self._time_at(0)
+        self.origin += shift
+        self._n = 0
+        self._st = self._sm = self._stt = self._stm = 0.0
+        for i in range(self.size):
+            self.times[i] -= shift
+            self._add_point(self.times[i], self.memory[i])
+
+    def _time_at(self, k: int) -> float:
+        """Time of the k-th oldest sample"""
+        return self.times[(self.head - self.size + k) % self.capacity]
+
+    def _index_of(self, k: int) -> int:
+        return (self.head - self.size + k) % self.capacity
+
+    def restarts_in_window(self, window: float, now: float) -> Optional[Tuple[int, float]]:
+        """Restarts observed within the window and the time span actually covered.
+
+        Returns None when there are fewer than two samples in the window.
+        """
+        if self.size < 2:
+            return None
+        since = now - window - self.origin
+        # Samples are in time order, so binary search for the first one in the window
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_at(mid) < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        if self.size - lo < 2:
+            return None
+        first, last = self._index_of(lo), self._index_of(self.size - 1)
+        # Restart counters only go up; a drop means the pod was recreated under the same name
+        delta = self.restarts[last] - self.restarts[first]
+        return max(delta, 0), self.times[last] - self.times[first]
+
+    def memory_trend(self) -> Optional[Tuple[float, float]]:
+        """Least-squares slope of memory % per minute over the buffer, and the latest value"""
+        n = self._n
+        if n < 3 or self.size == 0:
+            return None
+        latest = self.memory[self._index_of(self.size - 1)]
+        if latest != latest:
+            return None
+        variance = self._stt - self._st * self._st / n
+        if variance <= 1e-9:
+            return None
+        slope = (self._stm - self._st * self._sm / n) / variance
+        return slope * 60, latest
+
+class ClusterHistory:
+    """Per-namespace collection of PodSeries fed by the background sampler.
+
+    Pods missing from a namespace's latest sample are treated as deleted
+    and evicted, so memory is bounded by live pods * HISTORY_SAMPLES.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or settings.HISTORY_SAMPLES
+        self._namespaces: Dict[str, Dict[str, PodSeries]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, namespace: str, pods, timestamp: float = None):
+        """Append one sample per pod and evict pods that no longer exist"""
+        self.record_rows(
+            namespace, ((pod.name, pod.restarts, pod.status, pod.cpu_percent, pod.memory_percent) for pod in pods),
+            timestamp
+        )
+
+    def record_rows(self, namespace: str, rows, timestamp: float = None):
+        """Like record, from (name, restarts, status, cpu %, memory %) rows"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            previous = self._namespaces.get(namespace, {})
+            current = {}
+            for name, restarts, status, cpu_percent, memory_percent in rows:
+                series = previous.get(name)
+                if series is None:
+                    series = PodSeries(self.capacity)
+                series.append(timestamp, restarts, status, cpu_percent, memory_percent)
+                current[name] = series
+            self._namespaces[namespace] = current
+
+    def forget_namespace(self, namespace: str):
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def get(self, namespace: str, pod_name: str) -> Optional[PodSeries]:
+        return self._namespaces.get(namespace, {}).get(pod_name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pods = sum(len(series) for series in self._namespaces.values())
+        return {
+            "namespaces": len(self._namespaces),
+            "pods": pods,
+            "samples_per_pod": self.capacity,
+            "approx_bytes": pods * self.capacity * 25
+        }
+
+def sample_rows(pods) -> List[list]:
+    """The fields history keeps per pod, as JSON-encodable rows"""
+    return [[pod.name, pod.restarts, pod.status, pod.cpu_percent, pod.memory_percent] for pod in pods]
+
+class HistorySampler:
+    """Samples pod state for each namespace every ``interval`` seconds.
+
+    With a shared state backend only the holder of the "history_sampler"
+    lease lists pods. It publishes each sample and the other workers record
+    the same samples, so the apiserver sees one list per namespace per tick
+    and every worker evaluates rate and trend rules on the same history.
+    """
+
+    def __init__(self, k8s_client, history: ClusterHistory, namespaces: List[str], interval: float,
+                 state: Optional[StateBackend] = None):
+        self.k8s_client = k8s_client
+        self.history = history
+        self.namespaces = namespaces
+        self.interval = interval
+        self.state = state if state is not None and state.shared else None
+        self.leader = self.state is None
+        # namespace -> timestamp of the last published sample recorded here
+        self._recorded: Dict[str, float] = {}
+
+    def _key(self, namespace: str) -> str:
+        return f"history_sample:{self.k8s_client.current_cluster}:{namespace}"
+
+    def _set_leader(self, leader: bool):
+        self.leader = leader
+
+    async def run(self):
+        if self.state is not None:
+            asyncio.create_task(run_as_leader(
+                self.state, "history_sampler", lambda: self._set_leader(True), lambda: self._set_leader(False)
+            ))
+        while True:
+            # Followers poll twice per interval so they do not miss a published sample
+            await asyncio.sleep(self.interval if self.leader else self.interval / 2)
+            if self.k8s_client.current_cluster is None:
+                continue
+            for namespace in self.namespaces:
+                try:
+                    if self.leader:
+                        await self._sample(namespace)
+                    else:
+                        await self._follow(namespace)
+                except Exception as e:
+                    logger.error(f"History sampling failed for {namespace}: {e}")
+
+    async def _sample(self, namespace: str):
+        pods = await self.k8s_client.get_pods(namespace)
+        # get_pods returns [] or cached pods on API errors; don't record a failed list
+        if self.k8s_client.last_error is not None:
+            return
+        timestamp = time.time()
+        rows = sample_rows(pods)
+        self.history.record_rows(namespace, rows, timestamp)
+        if self.state is not None:
+            await self.state.aset(self._key(namespace), {"timestamp": timestamp, "rows": rows}, ttl=self.interval * 3)
+
+    async def _follow(self, namespace: str):
+        sample = await self.state.aget(self._key(namespace))
+        if sample is None or sample["timestamp"] <= self._recorded.get(namespace, 0.0):
+            return
+        self._recorded[namespace] = sample["timestamp"]
+        self.history.record_rows(namespace, sample["rows"], sample["timestamp"])
+
+async def run_sampler(k8s_client, history: ClusterHistory, namespaces: List[str], interval: float,
+                      state: Optional[StateBackend] = None):
+    """Background task: keep ``history`` sampled, see HistorySampler"""
+    await HistorySampler(k8s_client, history, namespaces, interval, state).run()
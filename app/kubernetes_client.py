@@ -1,112 +1,422 @@
-from kubernetes import client, config, watch
+from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from urllib3.exceptions import HTTPError as TransportError
 import boto3
 import asyncio
-from typing import List, Dict, Any, AsyncGenerator
-from models import PodInfo, Issue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, AsyncGenerator, Optional, Tuple
+from models import PodInfo, PodRecord, Issue
+from metrics import track, K8S_API_LATENCY
+from resource_metrics import PodMetricsCollector, pod_limits
+from node_analysis import NodeSnapshotCollector
+from config import settings
+from shared_state import StateBackend, MemoryBackend
+from resilience import Dependency, DependencyUnavailable
 import logging
 
 logger = logging.getLogger(__name__)
 
+def compact_events(items, namespace: str, window_seconds: float = 0, now: datetime = None,
+                   compact: bool = True) -> List[Dict[str, Any]]:
+    """Collapse raw events by involved object, reason and type.
+
+    Counts are summed, the earliest first and latest last timestamps are
+    kept and the message comes from the most recent event. Events whose
+    last occurrence is older than window_seconds are dropped (0 keeps all).
+    With compact=False every event is kept as its own entry.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=window_seconds) if window_seconds else None
+    groups = {}
+    for event in items:
+        first = event.first_timestamp or getattr(event, "event_time", None)
+        last = event.last_timestamp or first
+        if cutoff is not None and last is not None and last < cutoff:
+            continue
+        obj = event.involved_object
+        key = (obj.kind, obj.name, obj.namespace, event.reason, event.type) if compact else id(event)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [event, first, last, event.count or 1, 1]
+            continue
+        group[3] += event.count or 1
+        group[4] += 1
+        if first is not None and (group[1] is None or first < group[1]):
+            group[1] = first
+        if last is not None and (group[2] is None or last > group[2]):
+            group[0], group[2] = event, last
+    
+    ordered = sorted(groups.values(), key=lambda g: (g[2] is not None, g[2] or 0), reverse=True)
+    event_list = []
+    for event, first, last, count, occurrences in ordered:
+        first_iso = first.isoformat() if first else None
+        event_list.append({
+            "type": event.type,
+            "reason": event.reason,
+            "message": event.message,
+            "object": f"{event.involved_object.kind}/{event.involved_object.name}",
+            "namespace": event.involved_object.namespace or namespace,
+            "timestamp": first_iso,
+            "first_timestamp": first_iso,
+            "last_timestamp": last.isoformat() if last else None,
+            "count": count,
+            # Number of raw event objects merged into this entry
+            "occurrences": occurrences
+        })
+    return event_list
+
+# Raised by the client below ApiException: connection refused/reset, read timeouts
+# (_request_timeout), retries exhausted, truncated responses
+TRANSPORT_ERRORS = (TransportError, OSError)
+
+def is_api_failure(error: BaseException) -> bool:
+    """Errors that mean the apiserver is degraded; answers like 403 or 404 do not"""
+    if not isinstance(error, ApiException):
+        return True
+    return not error.status or error.status >= 500 or error.status == 429
+
+def kubernetes_dependency() -> Dependency:
+    """Concurrency, timeout and circuit breaker shared by all Kubernetes API calls"""
+    return Dependency(
+        "kubernetes", settings.K8S_MAX_CONCURRENCY, settings.K8S_CALL_TIMEOUT,
+        max_waiting=settings.DEPENDENCY_MAX_WAITING,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.BREAKER_RESET_TIMEOUT,
+        is_failure=is_api_failure
+    )
+
+# Successful calls refresh the shared connection status at most this often
+STATUS_PUBLISH_INTERVAL = 5.0
+# Workers re-read the shared connection at most this often
+CONNECTION_SYNC_INTERVAL = 2.0
+# Backoff before retrying a shared connection this worker failed to adopt, doubled per failure
+CONNECTION_RETRY_MIN = 5.0
+CONNECTION_RETRY_MAX = 300.0
+
 class KubernetesClient:
-    def __init__(self):
+    def __init__(self, state: Optional[StateBackend] = None):
         self.v1 = None
         self.current_cluster = None
+        self.region = None
+        # Connectivity state, updated as a side effect of regular API calls
+        self.last_success = None
+        self.last_error = None
+        self._published_at = 0.0
+        # Shared connection generation in use, and (generation, retry at, delay) after a failed adoption
+        self._generation = None
+        self._failed_generation: Optional[Tuple[Any, float, float]] = None
+        self._synced_at = 0.0
+        self._syncing = False
+        # Connection and status are published here so every worker agrees on them
+        self.state = state or MemoryBackend()
+        self.api = kubernetes_dependency()
+        self.usage_collector = PodMetricsCollector(self.api, state=self.state)
+        self.node_collector = NodeSnapshotCollector(self.api)
+        # Last good results per namespace, served while the apiserver is degraded
+        self._last_pods: Dict[str, List[PodRecord]] = {}
+        self._last_events: Dict[tuple, List[Dict[str, Any]]] = {}
+        self._log_streams = 0
+        # Log reads block for up to LOG_READ_TIMEOUT, so they get their own threads rather
+        # than the default executor; threads start on first use, after the fork
+        self._log_readers = ThreadPoolExecutor(settings.LOG_MAX_STREAMS, thread_name_prefix="log-stream")
     
-    async def connect(self, cluster_name: str, region: str) -> bool:
+    def _configure(self, cluster_name: str, region: str):
+        """Write and load the kubeconfig for an EKS cluster (blocking: AWS API and aws CLI)"""
+        # Update kubeconfig for EKS cluster
+        eks_client = boto3.client('eks', region_name=region)
+        
+        # Get cluster info
+        eks_client.describe_cluster(name=cluster_name)
+        
+        # Configure kubectl
+        import subprocess
+        subprocess.run([
+            'aws', 'eks', 'update-kubeconfig',
+            '--region', region,
+            '--name', cluster_name
+        ], check=True)
+        
+        # Load kubeconfig
+        config.load_kube_config()
+        return client.CoreV1Api(), client.CustomObjectsApi()
+    
+    async def connect(self, cluster_name: str, region: str, publish: bool = True) -> bool:
         try:
-            # Update kubeconfig for EKS cluster
-            eks_client = boto3.client('eks', region_name=region)
-            
-            # Get cluster info
-            cluster_info = eks_client.describe_cluster(name=cluster_name)
-            
-            # Configure kubectl
-            import subprocess
-            subprocess.run([
-                'aws', 'eks', 'update-kubeconfig',
-                '--region', region,
-                '--name', cluster_name
-            ], check=True)
-            
-            # Load kubeconfig
-            config.load_kube_config()
-            self.v1 = client.CoreV1Api()
+            self.v1, custom_api = await asyncio.get_running_loop().run_in_executor(
+                None, self._configure, cluster_name, region
+            )
+            self.usage_collector.custom_api = custom_api
+            self.usage_collector.invalidate()
+            self.usage_collector.scope = cluster_name
+            self.node_collector.v1 = self.v1
+            self.node_collector.invalidate()
+            self.api.reset()
+            self._last_pods.clear()
+            self._last_events.clear()
             self.current_cluster = cluster_name
+            self.region = region
             
             # Test connection
             await self._test_connection()
+            await self._record_success()
+            if publish and self.state.shared:
+                # A new generation makes the other workers reconnect, even to the same cluster
+                self._generation = time.time_ns()
+                await self.state.aset("connection", {
+                    "cluster": cluster_name, "region": region, "generation": self._generation
+                })
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to cluster {cluster_name}: {e}")
+            await self._record_error(e)
             return False
     
+    async def sync_connection(self):
+        """Adopt a cluster connection made by another worker
+
+        The shared connection is read at most every CONNECTION_SYNC_INTERVAL
+        seconds and only one adoption runs at a time. A generation that
+        failed to connect is retried with exponential backoff.
+        """
+        now = time.monotonic()
+        if not self.state.shared or self._syncing or now - self._synced_at < CONNECTION_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        self._syncing = True
+        try:
+            shared = await self.state.aget("connection")
+            if not shared:
+                return
+            generation = shared.get("generation")
+            if generation == self._generation and shared["cluster"] == self.current_cluster:
+                return
+            failed = self._failed_generation
+            if failed is not None and failed[0] == generation and now < failed[1]:
+                return
+            logger.info(f"Adopting connection to {shared['cluster']} from shared state")
+            if await self.connect(shared["cluster"], shared["region"], publish=False):
+                self._generation, self._failed_generation = generation, None
+            else:
+                delay = min(failed[2] * 2, CONNECTION_RETRY_MAX) if failed and failed[0] == generation else CONNECTION_RETRY_MIN
+                self._failed_generation = (generation, time.monotonic() + delay, delay)
+                logger.warning(f"Could not adopt connection to {shared['cluster']}, retrying in {delay:.0f}s")
+        finally:
+            self._syncing = False
+    
+    async def watch_connection(self, interval: float = 2.0):
+        """Keep background tasks of this worker on the shared connection"""
+        while True:
+            try:
+                await self.sync_connection()
+            except Exception as e:
+                logger.error(f"Connection sync failed: {e}")
+            await asyncio.sleep(interval)
+    
+    async def _record_success(self):
+        self.last_success = time.time()
+        had_error, self.last_error = self.last_error, None
+        if had_error is not None or self.last_success - self._published_at >= STATUS_PUBLISH_INTERVAL:
+            await self._publish_status()
+    
+    async def _record_error(self, error: Exception):
+        changed = self.last_error != str(error)
+        self.last_error = str(error)
+        if changed:
+            await self._publish_status()
+    
+    async def _publish_status(self):
+        if not self.state.shared:
+            return
+        self._published_at = time.time()
+        try:
+            await self.state.aset("connection_status", {"last_success": self.last_success, "last_error": self.last_error})
+        except Exception as e:
+            logger.warning(f"Could not publish connection status: {e}")
+    
+    async def get_connection_status(self) -> Dict[str, Any]:
+        """Cluster connectivity as observed by recent API calls (no API call made)"""
+        status = {"last_success": self.last_success, "last_error": self.last_error}
+        if self.state.shared:
+            # Prefer whichever worker observed the cluster most recently
+            shared = await self.state.aget("connection_status")
+            if shared and (shared["last_success"] or 0) > (self.last_success or 0):
+                status = shared
+        return {
+            "connected": self.current_cluster is not None,
+            "cluster": self.current_cluster,
+            **status
+        }
+    
     async def _test_connection(self):
         try:
-            self.v1.list_namespace(limit=1)
+            with track(K8S_API_LATENCY, method="list_namespace"):
+                await self.api.call(self.v1.list_namespace, limit=1, timeout_kwarg="_request_timeout")
         except ApiException as e:
             raise Exception(f"Cannot connect to cluster: {e}")
     
-    async def get_pods(self, namespace: str = "default") -> List[Dict[str, Any]]:
+    async def get_pods(self, namespace: str = "default") -> List[PodRecord]:
         try:
-            pods = self.v1.list_namespaced_pod(namespace=namespace)
-            pod_list = []
+            with track(K8S_API_LATENCY, "k8s_list_pods", method="list_namespaced_pod"):
+                pods = await self.api.call(
+                    self.v1.list_namespaced_pod, namespace=namespace, timeout_kwarg="_request_timeout"
+                )
+            await self._record_success()
+            now = datetime.now(timezone.utc)
             
-            for pod in pods.items:
-                pod_info = {
-                    "name": pod.metadata.name,
-                    "namespace": pod.metadata.namespace,
-                    "status": pod.status.phase,
-                    "ready": self._get_ready_status(pod),
-                    "restarts": self._get_restart_count(pod),
-                    "age": self._calculate_age(pod.metadata.creation_timestamp),
-                    "node": pod.spec.node_name or "N/A"
-                }
-                pod_list.append(pod_info)
+            records = [
+                PodRecord(
+                    pod.metadata.name,
+                    pod.metadata.namespace,
+                    pod.status.phase,
+                    self._get_ready_status(pod),
+                    self._get_restart_count(pod),
+                    self._calculate_age(pod.metadata.creation_timestamp, now),
+                    pod.spec.node_name or "N/A",
+                    None, None, None, None
+                )
+                for pod in pods.items
+            ]
             
-            return pod_list
+            # One metrics.k8s.io list per namespace, joined to pods by name
+            try:
+                usage = await self.usage_collector.get_usage(namespace)
+            except Exception as e:
+                # Usage is optional (e.g. the state backend is down); list pods without it
+                logger.warning(f"Resource usage unavailable for {namespace}: {e}")
+                usage = {}
+            if usage:
+                limits = [pod_limits(pod) for pod in pods.items]
+                self.usage_collector.join(records, limits, usage)
             
+            self._last_pods[namespace] = records
+            return records
+            
+        except (DependencyUnavailable, *TRANSPORT_ERRORS) as e:
+            return await self._fallback(self._last_pods, namespace, "pods", e)
         except ApiException as e:
+            if is_api_failure(e):
+                return await self._fallback(self._last_pods, namespace, "pods", e)
             logger.error(f"Error getting pods: {e}")
+            await self._record_error(e)
             return []
     
-    async def get_events(self, namespace: str = "default") -> List[Dict[str, Any]]:
+    async def get_nodes(self) -> Dict[str, Dict[str, Any]]:
+        """Cached cluster-wide node snapshot, {node name: summary}; empty when unavailable"""
         try:
-            events = self.v1.list_namespaced_event(namespace=namespace)
-            event_list = []
-            
-            for event in events.items:
-                event_info = {
-                    "type": event.type,
-                    "reason": event.reason,
-                    "message": event.message,
-                    "object": f"{event.involved_object.kind}/{event.involved_object.name}",
-                    "timestamp": event.first_timestamp,
-                    "count": event.count or 1
-                }
-                event_list.append(event_info)
-            
+            return await self.node_collector.get_nodes()
+        except Exception as e:
+            logger.warning(f"Node analysis skipped: {e}")
+            return {}
+    
+    async def get_events(self, namespace: str = "default", window_minutes: Optional[float] = None,
+                         compact: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """List recent events, newest first, collapsed per involved object and reason"""
+        if window_minutes is None:
+            window_minutes = settings.EVENT_WINDOW_MINUTES
+        if compact is None:
+            compact = settings.ENABLE_EVENT_COMPACTION
+        try:
+            with track(K8S_API_LATENCY, "k8s_list_events", method="list_namespaced_event"):
+                events = await self.api.call(
+                    self.v1.list_namespaced_event, namespace=namespace, timeout_kwarg="_request_timeout"
+                )
+            await self._record_success()
+            event_list = compact_events(events.items, namespace, window_minutes * 60, compact=compact)
+            self._last_events[(namespace, window_minutes, compact)] = event_list
             return event_list
             
+        except (DependencyUnavailable, *TRANSPORT_ERRORS) as e:
+            return await self._fallback(self._last_events, (namespace, window_minutes, compact), "events", e)
         except ApiException as e:
+            if is_api_failure(e):
+                return await self._fallback(self._last_events, (namespace, window_minutes, compact), "events", e)
             logger.error(f"Error getting events: {e}")
+            await self._record_error(e)
+            return []
+    
+    async def get_logs(self, namespace: str, pod_name: str, tail_lines: int = 100) -> List[str]:
+        """Fetch the last lines of a pod's log"""
+        try:
+            with track(K8S_API_LATENCY, "k8s_read_log", method="read_namespaced_pod_log"):
+                log = await self.api.call(
+                    self.v1.read_namespaced_pod_log, name=pod_name, namespace=namespace, tail_lines=tail_lines,
+                    timeout_kwarg="_request_timeout"
+                )
+            return log.splitlines() if log else []
+        except (ApiException, DependencyUnavailable, *TRANSPORT_ERRORS) as e:
+            logger.error(f"Error reading logs for {pod_name}: {e}")
             return []
     
     async def stream_logs(self, namespace: str, pod_name: str) -> AsyncGenerator[str, None]:
+        """Follow a pod's log line by line.
+
+        The stream is opened through the Kubernetes dependency; reads then run
+        in a pool of LOG_MAX_STREAMS threads (apart from the default executor)
+        and the stream gives up after LOG_READ_TIMEOUT seconds without output.
+        Streams end after LOG_STREAM_TIMEOUT seconds and at most
+        LOG_MAX_STREAMS run at once in a worker.
+        """
+        if self._log_streams >= settings.LOG_MAX_STREAMS:
+            yield f"Error streaming logs: too many concurrent log streams (limit {settings.LOG_MAX_STREAMS})"
+            return
+        self._log_streams += 1
+        response = None
+        loop = asyncio.get_running_loop()
         try:
-            w = watch.Watch()
-            for event in w.stream(
-                self.v1.read_namespaced_pod_log,
-                name=pod_name,
-                namespace=namespace,
-                follow=True,
-                _preload_content=False
-            ):
-                yield event
+            response = await self.api.call(
+                self.v1.read_namespaced_pod_log, name=pod_name, namespace=namespace, follow=True,
+                _preload_content=False, _request_timeout=(settings.K8S_CALL_TIMEOUT, settings.LOG_READ_TIMEOUT)
+            )
+            chunks = response.stream(amt=None, decode_content=False)
+            deadline = loop.time() + settings.LOG_STREAM_TIMEOUT
+            pending = b""
+            read = None
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield f"Log stream closed after {settings.LOG_STREAM_TIMEOUT}s"
+                    break
+                # A read that timed out is still running in its thread; wait on it
+                # again rather than calling next() on the generator concurrently
+                if read is None:
+                    read = loop.run_in_executor(self._log_readers, next, chunks, None)
+                    # A read abandoned below fails once the response is closed; nobody awaits it
+                    read.add_done_callback(lambda f: f.cancelled() or f.exception())
+                try:
+                    chunk = await asyncio.wait_for(asyncio.shield(read), min(settings.LOG_READ_TIMEOUT, remaining))
+                except asyncio.TimeoutError:
+                    if remaining > settings.LOG_READ_TIMEOUT:
+                        yield f"Log stream closed: no output for {settings.LOG_READ_TIMEOUT:g}s"
+                        break
+                    continue
+                read = None
+                if chunk is None:
+                    break
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    yield line.decode("utf8", "replace")
+            if pending:
+                yield pending.decode("utf8", "replace")
                 
-        except ApiException as e:
+        except (ApiException, DependencyUnavailable, *TRANSPORT_ERRORS) as e:
             yield f"Error streaming logs: {e}"
+        finally:
+            self._log_streams -= 1
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    async def _fallback(self, cache: Dict, key, what: str, error: Exception) -> list:
+        """Last good result for ``key`` while the apiserver is degraded or unreachable; empty if there is none"""
+        await self._record_error(error)
+        cached = cache.get(key)
+        if cached is None:
+            logger.error(f"Error getting {what}, nothing cached to fall back to: {error}")
+            return []
+        logger.warning(f"Serving cached {what}: {error}")
+        return cached
     
     def _get_ready_status(self, pod) -> str:
         if not pod.status.container_statuses:
@@ -122,10 +432,10 @@ class KubernetesClient:
         
         return sum(cs.restart_count for cs in pod.status.container_statuses)
     
-    def _calculate_age(self, creation_timestamp) -> str:
-        from datetime import datetime, timezone
-        now = datetime.now(timezone.utc)
-        age = now - creation_timestamp
+    def _calculate_age(self, creation_timestamp, now: datetime = None) -> str:
+        if creation_timestamp is None:
+            return "unknown"
+        age = (now or datetime.now(timezone.utc)) - creation_timestamp
         
         days = age.days
         hours, remainder = divmod(age.seconds, 3600)
@@ -1,13 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends, WebSocket
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 import uvicorn
 from kubernetes_client import KubernetesClient
 from ai_analyzer import AIAnalyzer
-from models import ClusterConfig, AnalysisRequest, AnalysisResponse
+from models import ClusterConfig, AnalysisRequest, AnalysisResponse, POD_STATUS_FIELDS, POD_USAGE_FIELDS
+import metrics
+from metrics import track, track_stage, WEBSOCKET_SEND_LATENCY
+from config import settings
+from profiling import RequestProfiler, PROFILE_MODES
+from serialization import (
+    FastJSONResponse, parse_fields, select_fields, dumps,
+    etag_matches, not_modified, conditional_body_response,
+    ndjson_record, sse_record, StreamingAwareCompression
+)
+from delta import PodDeltaTracker
+from history import run_sampler
+from results_store import AnalysisStore, StoredResult
+from scheduler import AnalysisScheduler
+from shared_state import create_backend, run_as_leader
+from resilience import DependencyUnavailable, request_deadline, parse_timeout
+from typing import Any, AsyncIterator, Optional, Tuple
 import asyncio
 import json
 import logging
+import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -26,15 +45,116 @@ app = FastAPI(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Global instances
-k8s_client = KubernetesClient()
-ai_analyzer = AIAnalyzer()
+# Compress large JSON responses; brotli is preferred when available. Streams are left uncompressed.
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(StreamingAwareCompression, compressor=BrotliMiddleware,
+                       minimum_size=settings.COMPRESSION_MIN_SIZE, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(StreamingAwareCompression, compressor=GZipMiddleware,
+                       minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Global instances; created before gunicorn forks its workers (see gunicorn.conf.py)
+shared_state = create_backend(settings.STATE_BACKEND, settings.WORKERS)
+k8s_client = KubernetesClient(state=shared_state)
+ai_analyzer = AIAnalyzer(state=shared_state)
+pod_versions = PodDeltaTracker()
+results_store = AnalysisStore(
+    settings.RESULTS_DB_PATH, settings.RESULTS_RETENTION_HOURS, settings.RESULTS_MAX_RUNS_PER_NAMESPACE,
+    state=shared_state
+)
+scheduler: Optional[AnalysisScheduler] = None
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup"""
     logger.info("🚀 Starting EKS AI Troubleshooter...")
-    # RAG initialization happens in AIAnalyzer constructor
+    asyncio.create_task(ai_analyzer.initialize_rag())
+    asyncio.create_task(metrics.monitor_event_loop_lag())
+    if shared_state.shared:
+        asyncio.create_task(k8s_client.watch_connection())
+    if settings.ENABLE_HISTORY:
+        asyncio.create_task(run_sampler(
+            k8s_client, ai_analyzer.history, settings.HISTORY_NAMESPACES, settings.HISTORY_SAMPLE_INTERVAL,
+            state=shared_state
+        ))
+    if settings.ENABLE_SCHEDULER:
+        global scheduler
+        scheduler = AnalysisScheduler(
+            run=lambda namespace: analyze_and_store(namespace, source="scheduled"),
+            is_ready=lambda: k8s_client.current_cluster is not None,
+            namespaces=settings.SCHEDULE_NAMESPACES,
+            interval=settings.SCHEDULE_INTERVAL,
+            jitter=settings.SCHEDULE_JITTER,
+            concurrency=settings.SCHEDULE_CONCURRENCY,
+            on_cycle=results_store.prune
+        )
+        # Only one worker runs scheduled analyses; the others serve its results
+        asyncio.create_task(run_as_leader(shared_state, "scheduler", scheduler.start, scheduler.stop))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background analysis and close the results store"""
+    if scheduler is not None:
+        scheduler.stop()
+    results_store.close()
+
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    """Attach a Server-Timing header with per-stage latency breakdown"""
+    timings = metrics.start_request_timing()
+    start = time.perf_counter()
+    response = await call_next(request)
+    metrics.record_timing("total", time.perf_counter() - start)
+    response.headers["Server-Timing"] = metrics.format_server_timing(timings)
+    return response
+
+@app.middleware("http")
+async def deadline_middleware(request: Request, call_next):
+    """Give Kubernetes and RAG calls made for this request a shared deadline
+
+    REQUEST_TIMEOUT seconds, or less when the client sends X-Request-Timeout.
+    """
+    timeout = parse_timeout(request.headers.get("X-Request-Timeout"), settings.REQUEST_TIMEOUT)
+    with request_deadline(timeout):
+        return await call_next(request)
+
+# Probes must answer without waiting on a cluster connection
+UNSYNCED_PATHS = ("/api/health", "/metrics")
+
+@app.middleware("http")
+async def shared_connection_middleware(request: Request, call_next):
+    """Pick up a cluster connection made through another worker"""
+    if shared_state.shared and not request.url.path.startswith(UNSYNCED_PATHS):
+        await k8s_client.sync_connection()
+    return await call_next(request)
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Profile a request when ENABLE_PROFILING is set and X-Profile is sent"""
+    mode = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if not settings.ENABLE_PROFILING or mode not in PROFILE_MODES:
+        return await call_next(request)
+    
+    profiler = RequestProfiler(mode, settings.PROFILE_OUTPUT_DIR, settings.PROFILE_SAMPLE_INTERVAL)
+    if not profiler.start():
+        response = await call_next(request)
+        response.headers["X-Profile-Output"] = "busy"
+        return response
+    try:
+        response = await call_next(request)
+    finally:
+        label = request.url.path.strip("/").replace("/", "_") or "root"
+        output_path = profiler.stop(label)
+    if output_path:
+        response.headers["X-Profile-Output"] = output_path
+    return response
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Expose Prometheus metrics"""
+    payload, content_type = metrics.render_metrics()
+    return Response(content=payload, media_type=content_type)
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard():
@@ -69,32 +189,241 @@ async def connect_cluster(config: ClusterConfig):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/analyze", response_model=AnalysisResponse)
-async def analyze_cluster(request: AnalysisRequest):
-    """Analyze cluster with RAG-enhanced AI recommendations"""
+async def analyze_cluster(request: AnalysisRequest, http_request: Request):
+    """Analyze cluster with RAG-enhanced AI recommendations
+
+    Serves the latest stored (usually scheduled) result when it is younger
+    than ANALYSIS_MAX_AGE; refresh=true or include_logs=true analyze now.
+    Honours If-None-Match: an unchanged result returns 304 Not Modified.
+    """
     try:
-        # Get cluster data
-        pods = await k8s_client.get_pods(request.namespace)
-        events = await k8s_client.get_events(request.namespace)
-        
-        # Analyze issues
-        issues = ai_analyzer.detect_issues(pods, events)
-        
-        # Generate RAG-enhanced recommendations
-        recommendations = await ai_analyzer.generate_recommendations(issues)
-        
-        # Get intelligent insights
+        result = None
+        if not request.refresh and not request.include_logs:
+            result = await results_store.latest(current_cluster_key(), request.namespace)
+            if result is not None and result.age > settings.ANALYSIS_MAX_AGE:
+                result = None
+        if result is None:
+            result = await analyze_and_store(request.namespace, request.include_logs, source="on_demand")
+        return conditional_body_response(http_request, result.body, result.etag, headers={
+            "X-Analysis-Age": f"{result.age:.1f}",
+            "X-Analysis-Source": result.source,
+        })
+    except Exception as e:
+        logger.error(f"Analysis error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def current_cluster_key() -> str:
+    """Results are stored per cluster so switching clusters never serves stale data"""
+    return k8s_client.current_cluster or "unknown"
+
+async def iter_analysis(namespace: str, include_logs: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+    """Full analysis pipeline for one namespace, yielding partial results as they are ready
+
+    Yields ("summary", dict) as soon as pods are listed, ("issue", Issue) per
+    detected issue, ("root_cause", RootCause) per node finding (the pod
+    issues it folds were already yielded), ("recommendation", ...) as each
+    lookup completes, ("insights", list) and finally ("result", AnalysisResponse).
+    """
+    # Get cluster data
+    with track_stage("get_pods"):
+        pods = await k8s_client.get_pods(namespace)
+    by_status = {}
+    for pod in pods:
+        by_status[pod.status] = by_status.get(pod.status, 0) + 1
+    yield "summary", {"namespace": namespace, "pod_count": len(pods), "by_status": by_status}
+    
+    # Analyze issues: pods first, then events, so the first issues do not wait on the event list
+    with track_stage("detect_issues"):
+        issues = ai_analyzer.detect_issues(pods, [], namespace=namespace)
+    for issue in issues:
+        yield "issue", issue
+    with track_stage("get_events"):
+        events = await k8s_client.get_events(namespace)
+    with track_stage("detect_issues"):
+        event_issues = ai_analyzer.detect_issues([], events, namespace=namespace)
+    for issue in event_issues:
+        yield "issue", issue
+    issues.extend(event_issues)
+    
+    # Scan recent logs of pods that already have issues
+    if include_logs and issues:
+        with track_stage("logs"):
+            logs = await fetch_issue_logs(namespace, issues)
+            log_issues = ai_analyzer.detect_issues([], [], logs=logs, namespace=namespace)
+        for issue in log_issues:
+            yield "issue", issue
+        issues.extend(log_issues)
+    
+    # Correlate by node: NotReady/pressure nodes and failure concentration become root causes
+    with track_stage("nodes"):
+        nodes = await k8s_client.get_nodes()
+        issues, root_causes = ai_analyzer.detect_node_issues(nodes, pods, issues, namespace)
+    for cause in root_causes:
+        yield "root_cause", cause
+    
+    # Generate RAG-enhanced recommendations
+    recommendations = []
+    with track_stage("recommendations"):
+        async for rec in ai_analyzer.iter_recommendations(issues):
+            recommendations.append(rec)
+            yield "recommendation", rec
+    
+    # Get intelligent insights
+    with track_stage("insights"):
         cluster_data = ai_analyzer.analyze_resource_usage(pods)
         insights = await ai_analyzer.get_intelligent_insights(cluster_data)
-        
-        return AnalysisResponse(
-            issues=issues,
-            recommendations=recommendations,
-            cluster_health="healthy" if not issues else "issues_detected",
-            insights=insights
+    yield "insights", insights
+    
+    yield "result", AnalysisResponse(
+        issues=issues,
+        recommendations=recommendations,
+        cluster_health="healthy" if not issues else "issues_detected",
+        insights=insights,
+        root_causes=root_causes
+    )
+
+async def run_analysis(namespace: str, include_logs: bool = False) -> AnalysisResponse:
+    """Full analysis pipeline for one namespace"""
+    async for kind, payload in iter_analysis(namespace, include_logs):
+        if kind == "result":
+            return payload
+
+async def analyze_and_store(namespace: str, include_logs: bool = False, source: str = "on_demand") -> StoredResult:
+    """Run the analysis, encode it once and persist it as the latest result"""
+    start = time.perf_counter()
+    cluster = current_cluster_key()
+    response = await run_analysis(namespace, include_logs)
+    return await store_result(cluster, namespace, response, time.perf_counter() - start, source)
+
+async def store_result(cluster: str, namespace: str, response: AnalysisResponse,
+                       duration: float, source: str) -> StoredResult:
+    """Encode a finished analysis once and persist it as the latest result"""
+    with track_stage("serialize"):
+        body = dumps(response.model_dump())
+    try:
+        return await results_store.save(
+            cluster, namespace, body, duration, source, response.cluster_health, len(response.issues)
         )
     except Exception as e:
-        logger.error(f"Analysis error: {e}")
+        # A full or read-only disk must not break live analysis
+        logger.error(f"Failed to store analysis result: {e}")
+        return StoredResult(0, time.time(), duration, source, body)
+
+@app.get("/api/analyze/stream/{namespace}")
+async def analyze_stream(namespace: str, request: Request, include_logs: bool = False,
+                         format: Optional[str] = None):
+    """Stream a live analysis as NDJSON, or as Server-Sent Events with ?format=sse
+    (or Accept: text/event-stream)
+
+    Records arrive in order: summary, issue..., root_cause..., recommendation...,
+    insights, complete. Each NDJSON line is {"type": ..., "data": ...}; SSE uses
+    the type as the event name. A recommendation whose description repeats an
+    earlier one (RAG guidance is shared per issue type and namespace) omits it
+    and gives that recommendation's index as "description_of". Records that
+    are ready together go out in one body chunk. The finished result is
+    stored like an on-demand /api/analyze run.
+    """
+    if format not in (None, "ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+    encode = sse_record if sse else ndjson_record
+    cluster = current_cluster_key()
+    
+    async def records(queue: asyncio.Queue):
+        start = time.perf_counter()
+        descriptions = {}
+        recommendation_count = 0
+        try:
+            async for kind, payload in iter_analysis(namespace, include_logs):
+                if kind == "recommendation":
+                    first = descriptions.setdefault(payload.description, recommendation_count)
+                    recommendation_count += 1
+                    if first != recommendation_count - 1:
+                        payload = payload.model_dump()
+                        del payload["description"]
+                        payload["description_of"] = first
+                elif kind == "result":
+                    stored = await store_result(cluster, namespace, payload, time.perf_counter() - start, "on_demand")
+                    kind, payload = "complete", {
+                        "cluster_health": payload.cluster_health,
+                        "issue_count": len(payload.issues),
+                        "run_id": stored.id or None,
+                        "duration": round(time.perf_counter() - start, 3)
+                    }
+                queue.put_nowait(encode(kind, payload))
+                if kind == "summary":
+                    # Ship the summary before issue detection runs
+                    await asyncio.sleep(0)
+        except Exception as e:
+            logger.error(f"Streaming analysis error: {e}")
+            queue.put_nowait(encode("error", {"detail": str(e)}))
+        finally:
+            queue.put_nowait(None)
+    
+    async def chunks():
+        # Every body chunk passes through each middleware, so send whatever the
+        # analysis produced before its next await as one chunk, not one per record
+        queue = asyncio.Queue()
+        producer = asyncio.create_task(records(queue))
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                done = batch[-1] is None
+                if done:
+                    batch.pop()
+                if batch:
+                    yield b"".join(batch)
+                if done:
+                    break
+        finally:
+            producer.cancel()
+    
+    return StreamingResponse(
+        chunks(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/analyze/history/{namespace}")
+async def analysis_history(namespace: str, since: Optional[float] = None, limit: int = 50):
+    """Summaries of stored analysis runs for a namespace, newest first"""
+    try:
+        runs = await results_store.history(current_cluster_key(), namespace, since, max(1, min(limit, 1000)))
+        return {"cluster": current_cluster_key(), "namespace": namespace, "runs": runs, "count": len(runs)}
+    except Exception as e:
+        logger.error(f"Error reading analysis history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analyze/runs/{run_id}")
+async def analysis_run(run_id: int, request: Request):
+    """Full result of one stored analysis run"""
+    try:
+        row = await results_store.get(run_id)
+    except Exception as e:
+        logger.error(f"Error reading analysis run: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Analysis run {run_id} not found")
+    cluster, namespace, created_at, body = row
+    return conditional_body_response(request, body, headers={
+        "X-Analysis-Cluster": cluster,
+        "X-Analysis-Namespace": namespace,
+        "X-Analysis-Age": f"{time.time() - created_at:.1f}",
+    })
+
+async def fetch_issue_logs(namespace: str, issues) -> dict:
+    """Fetch log tails for up to MAX_LOG_PODS_PER_ANALYSIS pods named in issues"""
+    pod_names = []
+    for issue in issues:
+        kind, _, name = issue.resource.partition("/")
+        if kind == "Pod" and name not in pod_names:
+            pod_names.append(name)
+    logs = {}
+    for name in pod_names[:settings.MAX_LOG_PODS_PER_ANALYSIS]:
+        logs[name] = await k8s_client.get_logs(namespace, name, settings.LOG_TAIL_LINES)
+    return logs
 
 @app.websocket("/ws/logs/{namespace}/{pod_name}")
 async def websocket_logs(websocket: WebSocket, namespace: str, pod_name: str):
@@ -102,33 +431,112 @@ async def websocket_logs(websocket: WebSocket, namespace: str, pod_name: str):
     await websocket.accept()
     try:
         async for log_line in k8s_client.stream_logs(namespace, pod_name):
-            await websocket.send_text(log_line)
+            with track(WEBSOCKET_SEND_LATENCY):
+                await websocket.send_text(log_line)
     except Exception as e:
         await websocket.send_text(f"Error: {str(e)}")
     finally:
         await websocket.close()
 
-@app.get("/api/pods/{namespace}")
-async def get_pods(namespace: str = "default"):
-    """Get pods in a namespace"""
+@app.get("/api/pods/{namespace}", response_class=FastJSONResponse)
+async def get_pods(request: Request, namespace: str = "default",
+                   fields: Optional[str] = None, since: Optional[int] = None):
+    """Get pods in a namespace
+
+    Returns the pods' status fields; resource usage is served by
+    /api/pods/{namespace}/usage so that metrics refreshes do not change this
+    response. ?fields=name,status restricts the returned fields (usage
+    fields may be requested here too, at the cost of a full list and an
+    ETag that changes with every metrics refresh). ?since=<version>
+    returns only pods changed or removed after a previous response's
+    version, falling back to the full list if that version is too old.
+    """
+    selected = parse_fields(fields) or list(POD_STATUS_FIELDS)
+    with_usage = any(f in POD_USAGE_FIELDS for f in selected)
     try:
         pods = await k8s_client.get_pods(namespace)
-        return {"pods": pods, "namespace": namespace, "count": len(pods)}
+        version = pod_versions.update(namespace, pods)
+        # Deltas only track status changes
+        delta = pod_versions.delta(namespace, since) if since is not None and not with_usage else None
+        
+        field_key = "+".join(selected) if fields else "status"
+        usage_key = f"-{pod_versions.usage_version(namespace)}" if with_usage else ""
+        etag = f'W/"pods-{namespace}-{version}{usage_key}-{field_key}-{since if delta is not None else "full"}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        with track_stage("serialize"):
+            if delta is not None:
+                content = {
+                    "namespace": namespace,
+                    "version": version,
+                    "delta": True,
+                    "since": since,
+                    "changed": select_fields(delta["changed"], selected),
+                    "removed": delta["removed"],
+                    "count": len(pods)
+                }
+            else:
+                content = {
+                    "pods": select_fields(pods, selected),
+                    "namespace": namespace,
+                    "version": version,
+                    "delta": False,
+                    "count": len(pods)
+                }
+            return FastJSONResponse(content=content, headers={"ETag": etag, "Cache-Control": "no-cache"})
     except Exception as e:
         logger.error(f"Error getting pods: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/pods/{namespace}/usage", response_class=FastJSONResponse)
+async def get_pod_usage(request: Request, namespace: str = "default"):
+    """CPU and memory usage of the pods in a namespace, keyed by pod name
+
+    Versioned apart from /api/pods so metrics refreshes only invalidate this
+    response; pods without metrics are omitted.
+    """
+    try:
+        pods = await k8s_client.get_pods(namespace)
+        pod_versions.update(namespace, pods)
+        version = pod_versions.usage_version(namespace)
+        etag = f'W/"pod-usage-{namespace}-{version}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        with track_stage("serialize"):
+            content = {
+                "namespace": namespace,
+                "version": version,
+                "usage": {pod.name: {f: getattr(pod, f) for f in POD_USAGE_FIELDS}
+                          for pod in pods if pod.cpu_usage is not None or pod.memory_usage is not None}
+            }
+            return FastJSONResponse(content=content, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    except Exception as e:
+        logger.error(f"Error getting pod usage: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/health/live")
+async def liveness():
+    """Constant-time liveness probe; does not touch the cluster or vector store"""
+    return {"status": "alive"}
+
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
+    """Detailed status built from in-memory state (no store or cluster calls)"""
     try:
         rag_stats = await ai_analyzer.get_rag_stats()
+        connection = await k8s_client.get_connection_status()
         return {
             "status": "healthy",
-            "cluster_connected": k8s_client.current_cluster is not None,
-            "current_cluster": k8s_client.current_cluster,
+            "cluster_connected": connection["connected"],
+            "current_cluster": connection["cluster"],
+            "cluster_connection": connection,
             "rag_knowledge_base": rag_stats,
-            "version": "1.0.0"
+            "caches": {"pod_versions": pod_versions.stats(), "history": ai_analyzer.history.stats()},
+            "dependencies": {"kubernetes": k8s_client.api.status(), "rag": ai_analyzer.rag_kb.dependency.status()},
+            "scheduler": {"leader": scheduler.running, "namespaces": scheduler.status()} if scheduler else None,
+            "worker": {"pid": os.getpid(), "workers": settings.WORKERS, "state_backend": type(shared_state).__name__},
+            "version": settings.VERSION
         }
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -146,18 +554,24 @@ async def query_knowledge_base(q: str, limit: int = 3):
             "results": results,
             "count": len(results)
         }
+    except DependencyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"RAG query error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rag/add-knowledge")
 async def add_custom_knowledge(title: str, content: str, category: str = "custom"):
-    """Add custom knowledge to the RAG system"""
+    """Add custom knowledge to the RAG system
+
+    With several workers it may be queued for the worker that writes the
+    store ("status": "queued") and becomes searchable a few seconds later.
+    """
     try:
-        await ai_analyzer.rag_kb.add_custom_knowledge(title, content, category)
+        added = await ai_analyzer.rag_kb.add_custom_knowledge(title, content, category)
         return {
-            "status": "success",
-            "message": f"Added knowledge: {title}",
+            "status": "success" if added else "queued",
+            "message": f"{'Added' if added else 'Queued'} knowledge: {title}",
             "category": category
         }
     except Exception as e:
@@ -196,11 +610,14 @@ async def get_cost_optimization_tips():
             "estimated_savings": "Up to 70% with spot instances",
             "current_setup": "Optimized for <$15/month"
         }
+    except DependencyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting cost tips: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    # Single process; for several workers use: gunicorn -c gunicorn.conf.py main:app
     uvicorn.run(
         app, 
         host="0.0.0.0", 
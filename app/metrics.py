@@ -0,0 +1,136 @@
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+)
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Tuple, Optional
+import asyncio
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-request list of (name, seconds) used to build the Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+STAGE_LATENCY = Histogram(
+    "troubleshooter_stage_seconds",
+    "Time spent in each stage of an API request",
+    ["stage"]
+)
+K8S_API_LATENCY = Histogram(
+    "troubleshooter_k8s_api_seconds",
+    "Latency of Kubernetes API calls",
+    ["method"]
+)
+EMBEDDING_LATENCY = Histogram(
+    "troubleshooter_embedding_encode_seconds",
+    "Time spent encoding text with the embedding model"
+)
+VECTOR_QUERY_LATENCY = Histogram(
+    "troubleshooter_vector_query_seconds",
+    "Latency of vector store queries"
+)
+WEBSOCKET_SEND_LATENCY = Histogram(
+    "troubleshooter_websocket_send_seconds",
+    "Time spent sending a single WebSocket message"
+)
+CACHE_HITS = Counter(
+    "troubleshooter_cache_hits_total",
+    "Cache hits by cache name",
+    ["cache"]
+)
+CACHE_MISSES = Counter(
+    "troubleshooter_cache_misses_total",
+    "Cache misses by cache name",
+    ["cache"]
+)
+EVENT_LOOP_LAG = Gauge(
+    "troubleshooter_event_loop_lag_seconds",
+    "Most recent event loop scheduling delay",
+    multiprocess_mode="livemax"
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "troubleshooter_event_loop_lag_histogram_seconds",
+    "Distribution of event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+DEPENDENCY_REJECTIONS = Counter(
+    "troubleshooter_dependency_rejections_total",
+    "Dependency calls refused or abandoned (open circuit, busy, deadline, timeout)",
+    ["dependency", "reason"]
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "troubleshooter_dependency_in_flight",
+    "Dependency calls currently running in worker threads",
+    ["dependency"],
+    multiprocess_mode="livesum"
+)
+CIRCUIT_OPEN = Gauge(
+    "troubleshooter_circuit_open",
+    "1 while the dependency's circuit breaker is open",
+    ["dependency"],
+    multiprocess_mode="livemax"
+)
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """Start collecting stage timings for the current request"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+def record_timing(name: str, seconds: float):
+    """Record a timing entry for the current request, if one is being tracked"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Render timings as a Server-Timing header value (durations in milliseconds)
+
+    Repeated entries (e.g. one embedding per recommendation) are summed.
+    """
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+@contextmanager
+def track(histogram, timing_name: Optional[str] = None, **labels):
+    """Observe the duration of a block in a histogram and the request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        (histogram.labels(**labels) if labels else histogram).observe(elapsed)
+        if timing_name:
+            record_timing(timing_name, elapsed)
+
+def track_stage(stage: str):
+    """Time a named stage of request handling"""
+    return track(STAGE_LATENCY, stage, stage=stage)
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Continuously measure how late the event loop wakes up from a sleep"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the Prometheus exposition payload and its content type
+
+    With several workers (PROMETHEUS_MULTIPROC_DIR set, see gunicorn.conf.py)
+    the samples of all workers are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 
 class ClusterConfig(BaseModel):
@@ -9,6 +10,8 @@ class ClusterConfig(BaseModel):
 class AnalysisRequest(BaseModel):
     namespace: str = "default"
     include_logs: bool = False
+    # Bypass the latest scheduled/stored result and analyze now
+    refresh: bool = False
 
 class Issue(BaseModel):
     type: str
@@ -23,11 +26,19 @@ class Recommendation(BaseModel):
     description: str
     command: Optional[str] = None
 
+class RootCause(BaseModel):
+    """A node-level finding and the pod issues it explains"""
+    node: str
+    issues: List[Issue]
+    affected_pods: List[str]
+    folded_issues: int
+
 class AnalysisResponse(BaseModel):
     issues: List[Issue]
     recommendations: List[Recommendation]
     cluster_health: str
     insights: Optional[List[str]] = []
+    root_causes: List[RootCause] = []
 
 class PodInfo(BaseModel):
     name: str
@@ -39,6 +50,43 @@ class PodInfo(BaseModel):
     cpu_usage: Optional[str] = None
     memory_usage: Optional[str] = None
 
+@dataclass
+class PodRecord:
+    """Compact pod record returned by KubernetesClient.get_pods.
+
+    Uses __slots__ to keep per-pod overhead low and is serialized natively
+    by orjson. Supports pod["field"] access for dict-style callers.
+    """
+    __slots__ = ("name", "namespace", "status", "ready", "restarts", "age", "node",
+                 "cpu_usage", "memory_usage", "cpu_percent", "memory_percent")
+    name: str
+    namespace: str
+    status: str
+    ready: str
+    restarts: int
+    age: str
+    node: str
+    # Filled from metrics-server when available; percentages are of the pod's limits
+    cpu_usage: Optional[str]
+    memory_usage: Optional[str]
+    cpu_percent: Optional[float]
+    memory_percent: Optional[float]
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+POD_RECORD_FIELDS = frozenset(PodRecord.__slots__)
+# Resource usage changes on every metrics refresh, so it is versioned and served
+# apart from the pod's status fields
+POD_USAGE_FIELDS = ("cpu_usage", "memory_usage", "cpu_percent", "memory_percent")
+POD_STATUS_FIELDS = tuple(f for f in PodRecord.__slots__ if f not in POD_USAGE_FIELDS)
+
 class RAGQuery(BaseModel):
     query: str
     max_results: int = 3
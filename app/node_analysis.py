@@ -0,0 +1,132 @@
+from kubernetes.client.rest import ApiException
+from typing import Any, Dict, List, Optional, Tuple
+import time
+import logging
+
+from models import Issue, RootCause
+from metrics import track, K8S_API_LATENCY, CACHE_HITS, CACHE_MISSES
+from config import settings
+from resilience import Dependency, DependencyUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Node conditions other than Ready that indicate trouble when "True"
+PRESSURE_CONDITIONS = {
+    "MemoryPressure": "memory_pressure",
+    "DiskPressure": "disk_pressure",
+    "PIDPressure": "pid_pressure",
+    "NetworkUnavailable": "network_unavailable",
+}
+
+# Pods listed by name in node issue descriptions
+MAX_LISTED_PODS = 5
+
+def node_summary(node) -> Dict[str, Any]:
+    """Flatten a V1Node into the fields node rules match on"""
+    summary = {
+        "name": node.metadata.name,
+        "ready": False,
+        "ready_reason": None,
+        "unschedulable": bool(getattr(node.spec, "unschedulable", False)),
+    }
+    for field in PRESSURE_CONDITIONS.values():
+        summary[field] = False
+    for condition in (node.status.conditions or []):
+        if condition.type == "Ready":
+            summary["ready"] = condition.status == "True"
+            summary["ready_reason"] = condition.reason or condition.message
+        elif condition.type in PRESSURE_CONDITIONS:
+            summary[PRESSURE_CONDITIONS[condition.type]] = condition.status == "True"
+    return summary
+
+class NodeSnapshotCollector:
+    """Cluster-wide node snapshot from one list_node call, cached for NODE_CACHE_TTL seconds"""
+
+    def __init__(self, dependency: Dependency, ttl: float = None):
+        self.dependency = dependency
+        self.v1 = None
+        self.ttl = settings.NODE_CACHE_TTL if ttl is None else ttl
+        self._snapshot: Optional[Tuple[float, Dict[str, Dict[str, Any]]]] = None
+
+    def invalidate(self):
+        self._snapshot = None
+
+    async def get_nodes(self) -> Dict[str, Dict[str, Any]]:
+        """Return {node name: summary}; empty when nodes cannot be listed"""
+        if self.v1 is None or not settings.ENABLE_NODE_ANALYSIS:
+            return {}
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._snapshot[0] < self.ttl:
+            CACHE_HITS.labels(cache="nodes").inc()
+            return self._snapshot[1]
+        CACHE_MISSES.labels(cache="nodes").inc()
+        try:
+            with track(K8S_API_LATENCY, "k8s_list_nodes", method="list_node"):
+                nodes = await self.dependency.call(self.v1.list_node, timeout_kwarg="_request_timeout")
+            snapshot = {summary["name"]: summary for summary in map(node_summary, nodes.items)}
+        except DependencyUnavailable as e:
+            # Degraded apiserver: keep the last snapshot (even if expired) and retry next time
+            logger.warning(f"Node snapshot not refreshed: {e}")
+            return self._snapshot[1] if self._snapshot is not None else {}
+        except ApiException as e:
+            # Namespace-scoped credentials commonly cannot list nodes
+            logger.warning(f"Cannot list nodes, node analysis disabled until next refresh: {e.reason}")
+            snapshot = {}
+        except Exception as e:
+            # Node analysis is optional; a transport error must not fail the whole analysis
+            logger.warning(f"Node snapshot not refreshed: {e}")
+            return self._snapshot[1] if self._snapshot is not None else {}
+        self._snapshot = (now, snapshot)
+        return snapshot
+
+def index_pods_by_node(pods) -> Dict[str, List[Any]]:
+    """Group pod records by the node they are scheduled on (unscheduled pods are skipped)"""
+    index: Dict[str, List[Any]] = {}
+    for pod in pods:
+        node = pod["node"]
+        if node and node != "N/A":
+            index.setdefault(node, []).append(pod)
+    return index
+
+def node_fields(summary: Dict[str, Any], pods: List[Any], failing: set) -> Dict[str, Any]:
+    """Node summary plus per-node pod failure counts, for rule matching"""
+    failing_names = [pod["name"] for pod in pods if pod["name"] in failing]
+    fields = dict(summary)
+    fields["pod_count"] = len(pods)
+    fields["failing_pods"] = len(failing_names)
+    fields["failing_percent"] = round(100 * len(failing_names) / len(pods), 1) if pods else 0.0
+    fields["failing_pod_names"] = ", ".join(failing_names[:MAX_LISTED_PODS]) + (
+        f" and {len(failing_names) - MAX_LISTED_PODS} more" if len(failing_names) > MAX_LISTED_PODS else ""
+    )
+    return fields
+
+def fold_pod_issues(issues: List[Issue], node_issues: List[Issue],
+                    index: Dict[str, List[Any]]) -> Tuple[List[Issue], List[RootCause]]:
+    """Replace pod issues on nodes with a node-level finding by one root cause per node.
+
+    Returns the remaining issues (node issues first) and the root causes,
+    each listing the affected pods and the number of pod issues it explains.
+    """
+    if not node_issues:
+        return issues, []
+    findings: Dict[str, List[Issue]] = {}
+    for issue in node_issues:
+        findings.setdefault(issue.resource.partition("/")[2], []).append(issue)
+    pod_node = {pod["name"]: node for node in findings for pod in index.get(node, [])}
+
+    remaining = []
+    affected: Dict[str, Dict[str, None]] = {node: {} for node in findings}
+    folded = dict.fromkeys(findings, 0)
+    for issue in issues:
+        kind, _, name = issue.resource.partition("/")
+        node = pod_node.get(name) if kind == "Pod" else None
+        if node is None:
+            remaining.append(issue)
+        else:
+            affected[node][name] = None
+            folded[node] += 1
+    causes = [
+        RootCause(node=node, issues=node_findings, affected_pods=list(affected[node]), folded_issues=folded[node])
+        for node, node_findings in findings.items()
+    ]
+    return node_issues + remaining, causes
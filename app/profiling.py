@@ -0,0 +1,107 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import Counter
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sample")
+
+# Only one request is profiled at a time; cProfile cannot nest and
+# concurrent samplers would attribute each other's frames.
+_profile_lock = threading.Lock()
+
+class SamplingProfiler:
+    """Periodically samples a thread's stack and aggregates folded stacks.
+
+    The output format (``frame;frame;frame count`` per line) is accepted
+    directly by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+class RequestProfiler:
+    """Profiles a single request with cProfile or the sampling profiler.
+
+    Note that the event loop is shared, so other requests running
+    concurrently show up in the profile as well.
+    """
+
+    def __init__(self, mode: str, output_dir: str, sample_interval: float = 0.005):
+        self.mode = mode
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.output_path: Optional[str] = None
+        self._profiler = None
+        self._acquired = False
+
+    def start(self) -> bool:
+        """Start profiling; returns False if another request is already being profiled"""
+        if not _profile_lock.acquire(blocking=False):
+            return False
+        self._acquired = True
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = SamplingProfiler(threading.get_ident(), self.sample_interval)
+            self._profiler.start()
+        return True
+
+    def stop(self, label: str = "request") -> Optional[str]:
+        """Stop profiling and write the output file, returning its path"""
+        if not self._acquired:
+            return None
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+            if self.mode == "cprofile":
+                self._profiler.disable()
+                self.output_path = os.path.join(self.output_dir, f"{name}.prof")
+                self._profiler.dump_stats(self.output_path)
+            else:
+                self._profiler.stop()
+                self.output_path = os.path.join(self.output_dir, f"{name}.folded")
+                self._profiler.write_folded(self.output_path)
+            logger.info(f"Wrote {self.mode} profile to {self.output_path}")
+            return self.output_path
+        except Exception as e:
+            logger.error(f"Failed to write profile: {e}")
+            return None
+        finally:
+            _profile_lock.release()
+            self._acquired = False
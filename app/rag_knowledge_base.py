@@ -3,21 +3,71 @@ import requests
 from bs4 import BeautifulSoup
 from sentence_transformers import SentenceTransformer
 import chromadb
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from metrics import track, EMBEDDING_LATENCY, VECTOR_QUERY_LATENCY
+from resilience import Dependency, DependencyUnavailable
+from shared_state import StateBackend, locked_update, run_as_leader
+from config import settings
+import asyncio
 import logging
 import json
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# With several workers, the writer drains queued knowledge and followers pick up its stats this often
+KNOWLEDGE_SYNC_INTERVAL = 2.0
+# Shared state keys: knowledge waiting for the writer, and the writer's store stats
+QUEUE_KEY = "rag_queue"
+STATS_KEY = "rag_stats"
+
+@lru_cache(maxsize=None)
+def load_embedding_model(name: str = EMBEDDING_MODEL) -> SentenceTransformer:
+    """Load an embedding model once per process.
+
+    Under gunicorn with preload_app the app is imported in the master, so
+    the weights are loaded before forking and shared copy-on-write.
+    """
+    return SentenceTransformer(name)
+
 class RAGKnowledgeBase:
-    def __init__(self, persist_directory: str = "./knowledge_base"):
+    """Vector store of troubleshooting knowledge.
+
+    The local Chroma store is not safe to write from several processes, so
+    with shared state (several workers) one worker holds the rag_writer
+    lease: it alone seeds the store and writes knowledge that other workers
+    queue, and it publishes the store's stats. The other workers only read,
+    and reopen the store when the writer reports new documents. With
+    CHROMA_HOST every worker talks to the Chroma server instead.
+    """
+
+    def __init__(self, persist_directory: str = "./knowledge_base", state: Optional[StateBackend] = None):
         self.persist_directory = persist_directory
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        self.collection = self.client.get_or_create_collection(
-            name="k8s_troubleshooting",
-            metadata={"description": "Kubernetes and AWS troubleshooting knowledge"}
+        self.state = state
+        self.model = load_embedding_model()
+        # The vector store holds files and threads that must not cross a fork,
+        # so it is opened on first use in each worker
+        self._collection = None
+        self._pid = None
+        self._open_lock = threading.Lock()
+        # Writer's store version: the one this process opened and the latest it has seen
+        self._opened_version = self._seen_version = None
+        self.writer = state is None or not state.shared
+        # Queries run in worker threads, bounded and timed out, and fail fast while degraded
+        self.dependency = Dependency(
+            "rag", settings.RAG_MAX_CONCURRENCY, settings.RAG_CALL_TIMEOUT,
+            max_waiting=settings.DEPENDENCY_MAX_WAITING,
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.BREAKER_RESET_TIMEOUT
         )
+        # Stats are maintained in memory on writes so health probes never hit the store
+        self.document_count = 0
+        self.status = "not_loaded"
+        self.last_error = None
         self.knowledge_sources = {
             "kubernetes": [
                 "https://kubernetes.io/docs/tasks/debug/debug-application/debug-pods/",
@@ -79,28 +129,136 @@ class RAGKnowledgeBase:
             }
         }
     
+    def _needs_open(self) -> bool:
+        return (self._collection is None or self._pid != os.getpid()
+                or self._opened_version != self._seen_version)
+    
+    @property
+    def collection(self):
+        if self._needs_open():
+            with self._open_lock:
+                return self._open_collection()
+        return self._collection
+    
+    def _open_collection(self):
+        # Queries from several threads may race to open the store
+        if self._needs_open():
+            if settings.CHROMA_HOST:
+                self.client = chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+            else:
+                if self._collection is not None and self._pid == os.getpid():
+                    # The writer added documents; the client caches its index per path
+                    self.client.clear_system_cache()
+                self.client = chromadb.PersistentClient(path=self.persist_directory)
+            self._collection = self.client.get_or_create_collection(
+                name="k8s_troubleshooting",
+                metadata={"description": "Kubernetes and AWS troubleshooting knowledge"}
+            )
+            self._pid = os.getpid()
+            self._opened_version = self._seen_version
+            self._refresh_count()
+        return self._collection
+    
+    def _encode(self, text: str) -> List[float]:
+        """Encode a single text into an embedding vector"""
+        with track(EMBEDDING_LATENCY, "embed"):
+            return self.model.encode([text])[0].tolist()
+    
+    @property
+    def _queue_writes(self) -> bool:
+        """Writes from this process must go through the writer"""
+        return not self.writer and not settings.CHROMA_HOST
+    
+    async def run(self):
+        """Seed the store and, with several workers, keep writer and readers in step"""
+        if self.state is None or not self.state.shared:
+            await self.initialize_knowledge_base()
+            return
+        await asyncio.gather(
+            run_as_leader(self.state, "rag_writer", lambda: self._set_writer(True), lambda: self._set_writer(False)),
+            self._sync()
+        )
+    
+    def _set_writer(self, writer: bool):
+        self.writer = writer
+    
+    async def _sync(self):
+        seeded = False
+        while True:
+            try:
+                if self.writer:
+                    if not seeded:
+                        await self.initialize_knowledge_base()
+                        seeded = True
+                    await self._apply_queued()
+                    if settings.CHROMA_HOST:
+                        # Every worker writes to the server; count what they added
+                        await asyncio.to_thread(self._refresh_count)
+                    await self.state.aset(STATS_KEY, {
+                        "document_count": self.document_count,
+                        "status": self.status,
+                        "error": self.last_error,
+                        "version": self._seen_version
+                    })
+                else:
+                    seeded = False
+                    stats = await self.state.aget(STATS_KEY)
+                    if stats:
+                        self.document_count, self.status = stats["document_count"], stats["status"]
+                        self.last_error = stats["error"]
+                        if not settings.CHROMA_HOST:
+                            self._seen_version = stats["version"]
+            except Exception as e:
+                logger.error(f"Knowledge base sync failed: {e}")
+            await asyncio.sleep(KNOWLEDGE_SYNC_INTERVAL)
+    
+    def _written(self):
+        """Record a write by this process; readers reopen the store when they see the new version"""
+        self._refresh_count()
+        self._opened_version = self._seen_version = time.time_ns()
+    
+    async def _apply_queued(self):
+        queued = await locked_update(self.state, QUEUE_KEY, lambda _: [])
+        if not queued:
+            return
+        await asyncio.to_thread(self._add_custom, queued)
+        logger.info(f"Added {len(queued)} queued knowledge item(s)")
+    
     async def initialize_knowledge_base(self):
         """Initialize the knowledge base with curated content"""
         try:
-            # Check if knowledge base already exists
-            if self.collection.count() > 0:
+            # Opening the store, embedding and writing all block, so they run in a
+            # thread and health probes keep answering while the store is seeded.
+            # Check if knowledge base already exists (opens the store in this process)
+            if await asyncio.to_thread(lambda: self.collection.count()) > 0:
                 logger.info("Knowledge base already initialized")
                 return
             
             logger.info("Initializing knowledge base...")
-            
-            # Add error patterns
-            await self._add_error_patterns()
-            
-            # Add curated troubleshooting content
-            await self._add_curated_content()
-            
+            self.status = "initializing"
+            await asyncio.to_thread(self._seed)
             logger.info("Knowledge base initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize knowledge base: {e}")
+            self.status = "error"
+            self.last_error = str(e)
     
-    async def _add_error_patterns(self):
+    def _refresh_count(self):
+        """Refresh the cached document count after a write"""
+        self.document_count = self._collection.count()
+        self.status = "ready" if self.document_count > 0 else "empty"
+    
+    def _seed(self):
+        # Add error patterns
+        self._add_error_patterns()
+        
+        # Add curated troubleshooting content
+        self._add_curated_content()
+        
+        self._written()
+    
+    def _add_error_patterns(self):
         """Add error patterns to knowledge base"""
         for error_type, info in self.error_patterns.items():
             content = f"""
@@ -114,7 +272,7 @@ class RAGKnowledgeBase:
             {chr(10).join(f"- {solution}" for solution in info['solutions'])}
             """
             
-            embedding = self.model.encode([content])[0].tolist()
+            embedding = self._encode(content)
             
             self.collection.add(
                 documents=[content],
@@ -127,7 +285,7 @@ class RAGKnowledgeBase:
                 ids=[f"error_pattern_{error_type}"]
             )
     
-    async def _add_curated_content(self):
+    def _add_curated_content(self):
         """Add curated troubleshooting content"""
         curated_content = [
             {
@@ -178,7 +336,7 @@ class RAGKnowledgeBase:
         
         for idx, item in enumerate(curated_content):
             content = f"Title: {item['title']}\n\n{item['content']}"
-            embedding = self.model.encode([content])[0].tolist()
+            embedding = self._encode(content)
             
             self.collection.add(
                 documents=[content],
@@ -192,16 +350,24 @@ class RAGKnowledgeBase:
                 ids=[f"curated_{idx}"]
             )
     
-    async def query_knowledge_base(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
-        """Query the knowledge base for relevant information"""
-        try:
-            query_embedding = self.model.encode([query])[0].tolist()
-            
-            results = self.collection.query(
+    def _query(self, query: str, n_results: int):
+        """Embed the query and search the vector store (blocking, runs in a worker thread)"""
+        query_embedding = self._encode(query)
+        with track(VECTOR_QUERY_LATENCY, "vector_query"):
+            return self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results,
                 include=['documents', 'metadatas', 'distances']
             )
+    
+    async def query_knowledge_base(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+        """Query the knowledge base for relevant information
+
+        Raises DependencyUnavailable when the query is refused or times out,
+        so callers can fall back instead of reporting "no guidance".
+        """
+        try:
+            results = await self.dependency.call(self._query, query, n_results)
             
             formatted_results = []
             for i in range(len(results['documents'][0])):
@@ -213,6 +379,8 @@ class RAGKnowledgeBase:
             
             return formatted_results
             
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error querying knowledge base: {e}")
             return []
@@ -239,14 +407,17 @@ class RAGKnowledgeBase:
             
             return solution
             
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error getting contextual solution: {e}")
             return f"Error retrieving solution for {issue_type}. Please check logs manually."
     
-    async def add_custom_knowledge(self, title: str, content: str, category: str = "custom"):
-        """Add custom knowledge to the base"""
-        try:
-            embedding = self.model.encode([content])[0].tolist()
+    def _add_custom(self, items: List[Dict[str, str]]):
+        """Embed and write custom knowledge items (blocking, runs in a worker thread)"""
+        for item in items:
+            title, content = item["title"], item["content"]
+            embedding = self._encode(content)
             doc_id = f"custom_{title.lower().replace(' ', '_')}"
             
             self.collection.add(
@@ -254,28 +425,40 @@ class RAGKnowledgeBase:
                 embeddings=[embedding],
                 metadatas=[{
                     "type": "custom",
-                    "category": category,
+                    "category": item["category"],
                     "title": title,
                     "source": "user_added"
                 }],
                 ids=[doc_id]
             )
-            
+        self._written()
+    
+    async def add_custom_knowledge(self, title: str, content: str, category: str = "custom") -> bool:
+        """Add custom knowledge to the base
+
+        Returns False if it was queued for the writer worker, which adds it
+        within KNOWLEDGE_SYNC_INTERVAL seconds.
+        """
+        item = {"title": title, "content": content, "category": category}
+        if self._queue_writes:
+            await locked_update(self.state, QUEUE_KEY, lambda queued: (queued or []) + [item])
+            logger.info(f"Queued custom knowledge for the writer: {title}")
+            return False
+        try:
+            await asyncio.to_thread(self._add_custom, [item])
             logger.info(f"Added custom knowledge: {title}")
-            
         except Exception as e:
             logger.error(f"Error adding custom knowledge: {e}")
+        return True
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get knowledge base statistics"""
-        try:
-            count = self.collection.count()
-            return {
-                "total_documents": count,
-                "status": "ready" if count > 0 else "empty",
-                "model": "all-MiniLM-L6-v2",
-                "persist_directory": self.persist_directory
-            }
-        except Exception as e:
-            logger.error(f"Error getting stats: {e}")
-            return {"status": "error", "error": str(e)}
\ No newline at end of file
+        """Get knowledge base statistics from in-memory state"""
+        stats = {
+            "total_documents": self.document_count,
+            "status": self.status,
+            "model": EMBEDDING_MODEL,
+            "persist_directory": self.persist_directory
+        }
+        if self.last_error:
+            stats["error"] = self.last_error
+        return stats
\ No newline at end of file
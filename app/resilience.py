@@ -0,0 +1,270 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import functools
+import os
+import time
+import logging
+
+from metrics import DEPENDENCY_REJECTIONS, DEPENDENCY_IN_FLIGHT, CIRCUIT_OPEN
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current request must be answered; None outside requests
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """Bound every dependency call made in this context to finish within ``seconds``"""
+    token = _deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def parse_timeout(header: Optional[str], default: float) -> float:
+    """Request timeout from an X-Request-Timeout header (seconds), never above the default"""
+    try:
+        requested = float(header)
+    except (TypeError, ValueError):
+        return default
+    return min(requested, default) if requested > 0 else default
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current request's deadline, None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class DependencyUnavailable(Exception):
+    """A dependency call was refused or abandoned; callers fall back to cached or basic data.
+
+    ``reason`` is "open" (circuit breaker), "busy" (too many queued callers),
+    "deadline" (request out of time) or "timeout" (call took too long).
+    """
+
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable ({reason})")
+        self.dependency = dependency
+        self.reason = reason
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast until
+    ``reset_timeout`` seconds have passed; then one trial call decides whether
+    it closes again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def cancel_trial(self):
+        """The trial call was never made; let the next caller try"""
+        self._trial = False
+
+    def record_success(self):
+        self.state, self.failures, self.opened_at, self._trial = "closed", 0, None, False
+
+    def record_failure(self) -> bool:
+        """Count a failure; True if this opened the breaker"""
+        self.failures += 1
+        self._trial = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            opened = self.state != "open"
+            self.state, self.opened_at = "open", time.monotonic()
+            return opened
+        return False
+
+class Dependency:
+    """Bounded, timed and circuit-broken access to one blocking backend.
+
+    At most ``concurrency`` calls run at once, each in a thread of the
+    dependency's own pool; at most ``max_waiting`` callers queue for a slot,
+    further callers fail fast. A call is abandoned after ``timeout`` seconds
+    or when the request deadline passes, whichever is first. Its slot is only
+    released once the thread returns, so a hung backend holds at most
+    ``concurrency`` threads and never starves the default executor used for
+    store and state I/O. ``is_failure`` decides which exceptions count
+    towards the breaker (e.g. not a 404); calls stuck past ``timeout`` always
+    count, even when the caller stopped waiting earlier.
+    """
+
+    def __init__(self, name: str, concurrency: int, timeout: float, max_waiting: int = 100,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 is_failure: Callable[[BaseException], bool] = lambda e: True):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_waiting = max_waiting
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.is_failure = is_failure
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        # Start time of each call still running in a thread
+        self._started: Dict[asyncio.Future, float] = {}
+        self.in_flight = 0
+        self.waiting = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Bound to the running loop; a forked worker or a new loop gets a fresh one
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop or self._pid != os.getpid():
+            self._semaphore, self._loop = asyncio.Semaphore(self.concurrency), loop
+            # Threads stranded by the old loop, or missing after a fork, must not take the new slots
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix=f"dependency-{self.name}")
+            self._pid = os.getpid()
+            self._started = {}
+            self.in_flight = self.waiting = 0
+        return self._semaphore
+
+    def reset(self):
+        """Forget past failures, e.g. after connecting to another cluster"""
+        self.breaker.record_success()
+        CIRCUIT_OPEN.labels(dependency=self.name).set(0)
+
+    def _reject(self, reason: str) -> DependencyUnavailable:
+        DEPENDENCY_REJECTIONS.labels(dependency=self.name, reason=reason).inc()
+        return DependencyUnavailable(self.name, reason)
+
+    def _budget(self) -> float:
+        remaining = remaining_time()
+        if remaining is None:
+            return self.timeout
+        if remaining <= 0:
+            raise self._reject("deadline")
+        return min(self.timeout, remaining)
+
+    def _hung(self) -> bool:
+        """True if a call has held its slot for longer than ``timeout``"""
+        now = time.monotonic()
+        return any(now - started > self.timeout for started in self._started.values())
+
+    def _refuse(self, reason: str) -> DependencyUnavailable:
+        # No free slot because calls are stuck in the backend: that is a failure
+        # of the backend, not of this caller
+        if self._hung():
+            self._record_failure()
+        return self._reject(reason)
+
+    def _check_stuck(self, future: asyncio.Future):
+        """A call abandoned at the request deadline that is still running after ``timeout``"""
+        if not future.done():
+            self._record_failure()
+
+    def _release(self, semaphore: asyncio.Semaphore, future: asyncio.Future):
+        self._started.pop(future, None)
+        semaphore.release()
+        self.in_flight -= 1
+        DEPENDENCY_IN_FLIGHT.labels(dependency=self.name).dec()
+
+    async def call(self, fn: Callable[..., Any], *args, timeout_kwarg: Optional[str] = None, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in a thread under this dependency's limits.
+
+        With ``timeout_kwarg`` the remaining budget is also passed to ``fn``
+        under that name (e.g. ``_request_timeout`` for the Kubernetes client),
+        so the socket gives up along with the caller.
+        Raises DependencyUnavailable when the call is refused or abandoned.
+        """
+        if not self.breaker.allow():
+            raise self._reject("open")
+        semaphore = self.semaphore
+        try:
+            budget = self._budget()
+            if semaphore.locked():
+                if self.waiting >= self.max_waiting:
+                    raise self._refuse("busy")
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(semaphore.acquire(), budget)
+                except asyncio.TimeoutError:
+                    raise self._refuse("deadline" if budget < self.timeout else "busy")
+                finally:
+                    self.waiting -= 1
+            else:
+                await semaphore.acquire()
+        except BaseException:
+            # A refused or cancelled trial call must not leave a half-open breaker stuck
+            self.breaker.cancel_trial()
+            raise
+        try:
+            # Time spent queued counts against the request deadline
+            budget = self._budget()
+        except DependencyUnavailable:
+            semaphore.release()
+            self.breaker.cancel_trial()
+            raise
+
+        if timeout_kwarg:
+            kwargs[timeout_kwarg] = budget
+        self.in_flight += 1
+        DEPENDENCY_IN_FLIGHT.labels(dependency=self.name).inc()
+        context = copy_context()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+        self._started[future] = time.monotonic()
+        future.add_done_callback(lambda _: self._release(semaphore, future))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), budget)
+        except asyncio.TimeoutError:
+            if budget < self.timeout:
+                # Cut short by the caller's deadline; only a failure if the call
+                # is still stuck once its own timeout has passed
+                self.breaker.cancel_trial()
+                loop.call_later(self.timeout - budget, self._check_stuck, future)
+                raise self._reject("deadline")
+            self._record_failure()
+            raise self._reject("timeout")
+        except asyncio.CancelledError:
+            # The caller went away; the thread still holds its slot until it returns
+            self.breaker.cancel_trial()
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self):
+        if self.breaker.state != "closed":
+            logger.info(f"Circuit for {self.name} closed")
+            CIRCUIT_OPEN.labels(dependency=self.name).set(0)
+        self.breaker.record_success()
+
+    def _record_failure(self):
+        if self.breaker.record_failure():
+            logger.warning(f"Circuit for {self.name} opened after {self.breaker.failures} failures, "
+                           f"failing fast for {self.breaker.reset_timeout:.0f}s")
+            CIRCUIT_OPEN.labels(dependency=self.name).set(1)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+        }
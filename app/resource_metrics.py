@@ -0,0 +1,159 @@
+from kubernetes.client.rest import ApiException
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import time
+import logging
+
+from config import settings
+from metrics import track, K8S_API_LATENCY, CACHE_HITS, CACHE_MISSES
+from resilience import Dependency, DependencyUnavailable
+
+logger = logging.getLogger(__name__)
+
+# (cpu millicores, memory bytes); either may be None when not set
+Resources = Tuple[Optional[float], Optional[float]]
+
+_CPU_SUFFIXES = {"n": 1e-6, "u": 1e-3, "m": 1.0}
+_MEMORY_SUFFIXES = {
+    "Ki": 1024, "Mi": 1024 ** 2, "Gi": 1024 ** 3, "Ti": 1024 ** 4, "Pi": 1024 ** 5, "Ei": 1024 ** 6,
+    "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+}
+
+@lru_cache(maxsize=4096)
+def parse_cpu(quantity: str) -> float:
+    """Parse a Kubernetes CPU quantity ("250m", "1", "12345n") into millicores"""
+    quantity = str(quantity)
+    suffix = quantity[-1:]
+    if suffix in _CPU_SUFFIXES:
+        return float(quantity[:-1]) * _CPU_SUFFIXES[suffix]
+    return float(quantity) * 1000
+
+@lru_cache(maxsize=4096)
+def parse_memory(quantity: str) -> float:
+    """Parse a Kubernetes memory quantity ("128Mi", "1G", "1048576") into bytes"""
+    quantity = str(quantity)
+    for length in (2, 1):
+        suffix = quantity[-length:]
+        if suffix in _MEMORY_SUFFIXES:
+            return float(quantity[:-length]) * _MEMORY_SUFFIXES[suffix]
+    return float(quantity)
+
+def format_cpu(millicores: float) -> str:
+    return f"{millicores:.0f}m"
+
+def format_memory(num_bytes: float) -> str:
+    return f"{num_bytes / 1024 ** 2:.0f}Mi"
+
+def pod_limits(pod) -> Resources:
+    """Sum container limits for a pod; a dimension is None if any container leaves it unbounded"""
+    containers = getattr(pod.spec, "containers", None) or []
+    if not containers:
+        return None, None
+    cpu_total, memory_total = 0.0, 0.0
+    for container in containers:
+        limits = (container.resources.limits if container.resources else None) or {}
+        if cpu_total is not None:
+            cpu_total = cpu_total + parse_cpu(limits["cpu"]) if "cpu" in limits else None
+        if memory_total is not None:
+            memory_total = memory_total + parse_memory(limits["memory"]) if "memory" in limits else None
+    return cpu_total, memory_total
+
+class PodMetricsCollector:
+    """Batched, cached reader for metrics.k8s.io pod usage.
+
+    One list call per namespace fetches usage for every pod; the result is
+    indexed by pod name and cached for METRICS_CACHE_TTL seconds so repeated
+    analyses and pod listings share a single sample.
+    """
+
+    def __init__(self, dependency: Dependency, custom_api=None, ttl: float = None, state=None):
+        # Bounds and times out calls together with the other Kubernetes API calls
+        self.dependency = dependency
+        self.custom_api = custom_api
+        self.ttl = settings.METRICS_CACHE_TTL if ttl is None else ttl
+        self._cache: Dict[str, Tuple[float, Dict[str, Resources]]] = {}
+        self.available = True
+        # With several workers, one sample per TTL is shared through the state backend
+        self.state = state
+        self.scope = ""
+
+    def invalidate(self):
+        self._cache.clear()
+        self.available = True
+
+    async def get_usage(self, namespace: str) -> Dict[str, Resources]:
+        """Return {pod name: (cpu millicores, memory bytes)} for a namespace"""
+        if self.custom_api is None or not settings.ENABLE_METRICS_SERVER:
+            return {}
+
+        now = time.time()
+        cached = self._cache.get(namespace)
+        if cached is not None and now - cached[0] < self.ttl:
+            CACHE_HITS.labels(cache="pod_metrics").inc()
+            return cached[1]
+        
+        shared_key = f"pod_metrics:{self.scope}:{namespace}"
+        if self.state is not None and self.state.shared:
+            shared = await self.state.aget(shared_key)
+            if shared is not None:
+                index = {name: tuple(usage) for name, usage in shared["index"].items()}
+                self._cache[namespace] = (shared["sampled_at"], index)
+                CACHE_HITS.labels(cache="pod_metrics_shared").inc()
+                return index
+        CACHE_MISSES.labels(cache="pod_metrics").inc()
+
+        try:
+            with track(K8S_API_LATENCY, "k8s_pod_metrics", method="list_pod_metrics"):
+                response = await self.dependency.call(
+                    self.custom_api.list_namespaced_custom_object,
+                    group="metrics.k8s.io", version="v1beta1", namespace=namespace, plural="pods",
+                    timeout_kwarg="_request_timeout"
+                )
+            index = self._build_index(response.get("items", []))
+            self.available = True
+        except DependencyUnavailable as e:
+            # Degraded apiserver: keep the last sample (even if expired) and retry next time
+            logger.warning(f"Pod metrics for {namespace} not refreshed: {e}")
+            return cached[1] if cached is not None else {}
+        except ApiException as e:
+            if self.available:
+                logger.warning(f"metrics-server unavailable, resource usage disabled: {e.reason}")
+            self.available = False
+            index = {}
+        except Exception as e:
+            # Usage is optional; a transport error must not fail the pod listing
+            logger.warning(f"Pod metrics for {namespace} not refreshed: {e}")
+            return cached[1] if cached is not None else {}
+
+        # Failures are cached too, so a missing metrics-server costs one call per TTL
+        self._cache[namespace] = (now, index)
+        if self.state is not None and self.state.shared:
+            await self.state.aset(shared_key, {"sampled_at": now, "index": index}, ttl=self.ttl)
+        return index
+
+    @staticmethod
+    def _build_index(items: List[Dict]) -> Dict[str, Resources]:
+        index = {}
+        for item in items:
+            cpu, memory = 0.0, 0.0
+            for container in item.get("containers", []):
+                usage = container.get("usage", {})
+                cpu += parse_cpu(usage.get("cpu", "0"))
+                memory += parse_memory(usage.get("memory", "0"))
+            index[item["metadata"]["name"]] = (cpu, memory)
+        return index
+
+    @staticmethod
+    def join(records, limits: List[Resources], usage: Dict[str, Resources]):
+        """Fill usage and percent-of-limit fields on PodRecords in place"""
+        if not usage:
+            return
+        for record, (cpu_limit, memory_limit) in zip(records, limits):
+            sample = usage.get(record.name)
+            if sample is None:
+                continue
+            cpu, memory = sample
+            record.cpu_usage = format_cpu(cpu)
+            record.memory_usage = format_memory(memory)
+            record.cpu_percent = round(cpu / cpu_limit * 100, 1) if cpu_limit else None
+            record.memory_percent = round(memory / memory_limit * 100, 1) if memory_limit else None
@@ -0,0 +1,198 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+from serialization import body_etag
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cluster TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    source TEXT NOT NULL,
+    cluster_health TEXT NOT NULL,
+    issue_count INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_target_time ON analysis_runs (cluster, namespace, created_at);
+"""
+
+class StoredResult:
+    """The latest run for a cluster/namespace, kept in memory for instant serving"""
+    __slots__ = ("id", "created_at", "duration", "source", "body", "etag")
+
+    def __init__(self, run_id: int, created_at: float, duration: float, source: str, body: bytes):
+        self.id = run_id
+        self.created_at = created_at
+        self.duration = duration
+        self.source = source
+        self.body = body
+        self.etag = body_etag(body)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+class AnalysisStore:
+    """SQLite (WAL mode) store for analysis results with retention.
+
+    Payloads are stored as pre-encoded JSON so the latest result can be
+    served without re-serializing. All blocking SQLite work is exposed
+    through async wrappers that run it in a worker thread.
+
+    With several workers the id of the newest run per target is published
+    in the shared state, so a worker notices runs saved by its siblings.
+    The connection is opened lazily in each (forked) process.
+    """
+
+    def __init__(self, path: str, retention_hours: float, max_runs_per_namespace: int, state=None):
+        self.path = path
+        self.retention_seconds = retention_hours * 3600
+        self.max_runs_per_namespace = max_runs_per_namespace
+        self.state = state if state is not None and state.shared else None
+        self._lock = threading.Lock()
+        self._latest: Dict[Tuple[str, str], StoredResult] = {}
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _load_latest(self, cluster: str, namespace: str) -> Optional[StoredResult]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, created_at, duration, source, payload FROM analysis_runs "
+                "WHERE cluster = ? AND namespace = ? ORDER BY created_at DESC LIMIT 1",
+                (cluster, namespace)
+            ).fetchone()
+        if row is None:
+            return None
+        result = self._latest[(cluster, namespace)] = StoredResult(*row)
+        return result
+
+    async def latest(self, cluster: str, namespace: str) -> Optional[StoredResult]:
+        """Most recent result for a target, from memory (falls back to disk once)
+
+        Returns None when neither shared state nor the store can be read, so
+        the caller runs a live analysis instead of failing.
+        """
+        result = self._latest.get((cluster, namespace))
+        if result is not None and self.state is not None:
+            try:
+                newest = await self.state.aget(f"analysis_latest:{cluster}:{namespace}")
+            except Exception as e:
+                # Another worker may have stored a newer run; the store has it too
+                logger.warning(f"Shared state unavailable, reading latest result from the store: {e}")
+                newest = None
+                result = None
+            if newest is not None and newest != result.id:
+                result = None
+        if result is None:
+            try:
+                result = await asyncio.to_thread(self._load_latest, cluster, namespace)
+            except Exception as e:
+                logger.warning(f"Results store unavailable, running a live analysis: {e}")
+        return result
+
+    def _save(self, cluster: str, namespace: str, body: bytes, duration: float, source: str,
+              cluster_health: str, issue_count: int) -> StoredResult:
+        created_at = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO analysis_runs (cluster, namespace, created_at, duration, source, "
+                "cluster_health, issue_count, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cluster, namespace, created_at, duration, source, cluster_health, issue_count, body)
+            )
+            self.conn.commit()
+        result = StoredResult(cursor.lastrowid, created_at, duration, source, body)
+        self._latest[(cluster, namespace)] = result
+        if self.state is not None:
+            try:
+                self.state.set(f"analysis_latest:{cluster}:{namespace}", result.id)
+            except Exception as e:
+                # Other workers fall back to the store when they cannot read this either
+                logger.warning(f"Could not publish latest result to shared state: {e}")
+        return result
+
+    async def save(self, cluster: str, namespace: str, body: bytes, duration: float, source: str,
+                   cluster_health: str, issue_count: int) -> StoredResult:
+        return await asyncio.to_thread(
+            self._save, cluster, namespace, body, duration, source, cluster_health, issue_count
+        )
+
+    def _history(self, cluster: str, namespace: str, since: Optional[float], limit: int) -> List[Dict[str, Any]]:
+        query = ("SELECT id, created_at, duration, source, cluster_health, issue_count FROM analysis_runs "
+                 "WHERE cluster = ? AND namespace = ?")
+        params: List[Any] = [cluster, namespace]
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(since)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [
+            {"id": r[0], "created_at": r[1], "duration": r[2], "source": r[3],
+             "cluster_health": r[4], "issue_count": r[5]}
+            for r in rows
+        ]
+
+    async def history(self, cluster: str, namespace: str, since: Optional[float] = None,
+                      limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of past runs, newest first"""
+        return await asyncio.to_thread(self._history, cluster, namespace, since, limit)
+
+    def _get(self, run_id: int) -> Optional[Tuple[str, str, float, bytes]]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT cluster, namespace, created_at, payload FROM analysis_runs WHERE id = ?", (run_id,)
+            ).fetchone()
+
+    async def get(self, run_id: int) -> Optional[Tuple[str, str, float, bytes]]:
+        """Full payload of one run"""
+        return await asyncio.to_thread(self._get, run_id)
+
+    def _prune(self) -> int:
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            deleted = self.conn.execute("DELETE FROM analysis_runs WHERE created_at < ?", (cutoff,)).rowcount
+            deleted += self.conn.execute(
+                "DELETE FROM analysis_runs WHERE id IN ("
+                "  SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                "    PARTITION BY cluster, namespace ORDER BY created_at DESC) AS rn FROM analysis_runs)"
+                "  WHERE rn > ?)",
+                (self.max_runs_per_namespace,)
+            ).rowcount
+            self.conn.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} analysis runs")
+        return deleted
+
+    async def prune(self) -> int:
+        """Apply the retention policy (age and max runs per cluster/namespace)"""
+        return await asyncio.to_thread(self._prune)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,363 @@
+"""Declarative issue detection rules.
+
+Rules are loaded from YAML or JSON files and compiled once into matchers.
+Each target (pod, event, log, node) has a key field - the pod phase, the event
+reason - and for every distinct key value the engine computes, once, the
+list of rules whose key condition can match. Evaluating an object is then
+a single dictionary lookup plus the residual conditions of the few rules
+in that bucket, instead of scanning every rule.
+
+Rule format::
+
+    rules:
+      - id: pod-high-memory
+        target: pod                      # pod | event | log | node
+        group: memory                    # optional: first matching rule in a group wins
+        match:
+          status: Running                # equality
+          restarts: {gt: 5}              # eq ne in not_in gt gte lt lte
+          reason: {contains: Failed}     # contains prefix suffix regex exists
+          memory_percent: {gte: $MEMORY_USAGE_THRESHOLD}   # $NAME reads config.settings
+        issue:
+          type: HighMemoryUsage
+          severity: medium
+          severity_when:                 # optional escalation, first match wins
+            high: {memory_percent: {gte: 95}}
+          resource: "Pod/{name}"         # defaults per target
+          description: "Memory at {memory_percent}% of limit"
+        recommendation:                  # optional, looked up by issue type
+          action: "Raise Memory Limit"
+          command: "kubectl top pod {name} -n {namespace}"
+          rag: true                      # prefix the description with RAG guidance
+          resource_optimization: true    # also add general resource advice
+          fallback:                      # used when the RAG lookup fails
+            action: "Increase Memory Limits"
+            description: "..."
+            command: "..."
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import yaml
+
+from config import settings
+from models import Issue
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("pod", "event", "log", "node")
+KEY_FIELDS = {"pod": "status", "event": "reason", "log": None, "node": None}
+DEFAULT_RESOURCES = {"pod": "Pod/{name}", "event": "{object}", "log": "Pod/{name}", "node": "Node/{name}"}
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+
+# Cap on memoized key values per target; reasons and phases are low cardinality
+MAX_BUCKETS = 10000
+
+class RuleError(ValueError):
+    """Raised when a rule definition is invalid"""
+
+class _FormatFields(dict):
+    """Mapping for str.format_map over an object exposing .get()"""
+
+    def __init__(self, obj):
+        super().__init__()
+        self.obj = obj
+
+    def __missing__(self, key):
+        value = self.obj.get(key)
+        return "" if value is None else value
+
+def render_template(template: Optional[str], obj) -> Optional[str]:
+    """Fill {field} placeholders from an object exposing .get()"""
+    if template is None:
+        return None
+    try:
+        return template.format_map(_FormatFields(obj))
+    except (ValueError, TypeError, IndexError, AttributeError):
+        # e.g. a numeric format spec applied to a missing value
+        return template
+
+def _resolve(value: Any) -> Any:
+    """Replace "$SETTING_NAME" with the value from config.settings"""
+    if isinstance(value, str) and value.startswith("$"):
+        name = value[1:]
+        if not hasattr(settings, name):
+            raise RuleError(f"Unknown setting reference: {value}")
+        return getattr(settings, name)
+    if isinstance(value, list):
+        return [_resolve(v) for v in value]
+    return value
+
+def _compare(op: Callable[[Any, Any], bool], expected: Any) -> Callable[[Any], bool]:
+    def predicate(actual):
+        if actual is None:
+            return False
+        try:
+            return op(actual, expected)
+        except TypeError:
+            return False
+    return predicate
+
+_OPERATORS: Dict[str, Callable[[Any], Callable[[Any], bool]]] = {
+    "eq": lambda v: (lambda a: a == v),
+    "ne": lambda v: (lambda a: a != v),
+    "in": lambda v: (lambda a, s=frozenset(v): a in s),
+    "not_in": lambda v: (lambda a, s=frozenset(v): a not in s),
+    "gt": lambda v: _compare(lambda a, b: a > b, v),
+    "gte": lambda v: _compare(lambda a, b: a >= b, v),
+    "lt": lambda v: _compare(lambda a, b: a < b, v),
+    "lte": lambda v: _compare(lambda a, b: a <= b, v),
+    "contains": lambda v: (lambda a: isinstance(a, str) and v in a),
+    "prefix": lambda v: (lambda a: isinstance(a, str) and a.startswith(v)),
+    "suffix": lambda v: (lambda a: isinstance(a, str) and a.endswith(v)),
+    "regex": lambda v: (lambda a, r=re.compile(v): isinstance(a, str) and r.search(a) is not None),
+    "exists": lambda v: (lambda a: (a is not None) == bool(v)),
+}
+
+def compile_condition(field: str, spec: Any) -> Callable[[Any], bool]:
+    """Compile one field condition into a predicate over the field's value"""
+    if isinstance(spec, dict):
+        predicates = []
+        for op, value in spec.items():
+            if op not in _OPERATORS:
+                raise RuleError(f"Unknown operator '{op}' for field '{field}'")
+            try:
+                predicates.append(_OPERATORS[op](_resolve(value)))
+            except re.error as e:
+                raise RuleError(f"Invalid regex for field '{field}': {e}")
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda a: all(p(a) for p in predicates)
+    if isinstance(spec, list):
+        return _OPERATORS["in"](_resolve(spec))
+    return _OPERATORS["eq"](_resolve(spec))
+
+def _mapping(value: Any, what: str) -> Dict[str, Any]:
+    """An optional mapping from a rule spec; anything else is a RuleError"""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise RuleError(f"{what} must be a mapping, got {type(value).__name__}")
+    return value
+
+def compile_match(match: Dict[str, Any]) -> List[Tuple[str, Callable[[Any], bool]]]:
+    return [(field, compile_condition(field, spec)) for field, spec in (match or {}).items()]
+
+def _matches(conditions: List[Tuple[str, Callable[[Any], bool]]], obj) -> bool:
+    for field, predicate in conditions:
+        if not predicate(obj.get(field)):
+            return False
+    return True
+
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+def _scoped(pattern: str) -> str:
+    """Wrap a pattern for use in an alternation, turning leading (?i) into (?i:...)"""
+    flags = _GLOBAL_FLAGS.match(pattern)
+    if flags:
+        return f"(?{flags.group(1)}:{pattern[flags.end():]})"
+    return f"(?:{pattern})"
+
+class CompiledRule:
+    __slots__ = ("id", "target", "group", "key_predicate", "conditions", "issue_type", "severity",
+                 "severity_when", "resource", "description", "recommendation", "message_pattern")
+
+    def __init__(self, spec: Dict[str, Any], source: str):
+        if not isinstance(spec, dict):
+            raise RuleError(f"{source}: each rule must be a mapping, got {type(spec).__name__}")
+        issue = spec.get("issue")
+        self.id = spec.get("id") or f"{source}:{issue.get('type') if isinstance(issue, dict) else None}"
+        self.target = spec.get("target", "pod")
+        if self.target not in TARGETS:
+            raise RuleError(f"Rule {self.id}: unknown target '{self.target}'")
+        issue = _mapping(issue, f"Rule {self.id}: issue")
+        if not issue.get("type"):
+            raise RuleError(f"Rule {self.id}: issue.type is required")
+
+        match = dict(_mapping(spec.get("match"), f"Rule {self.id}: match"))
+        key_field = KEY_FIELDS[self.target]
+        self.key_predicate = compile_condition(key_field, match.pop(key_field)) if key_field in match else None
+        # Log rules keep their message pattern aside for the combined prefilter
+        self.message_pattern = None
+        if self.target == "log" and isinstance(match.get("message"), dict) and set(match["message"]) == {"regex"}:
+            self.message_pattern = match["message"]["regex"]
+        self.conditions = compile_match(match)
+        self.group = spec.get("group")
+
+        self.issue_type = issue["type"]
+        self.severity = issue.get("severity", "medium")
+        self.severity_when = [
+            (severity, compile_match(_mapping(when, f"Rule {self.id}: severity_when.{severity}")))
+            for severity, when in _mapping(issue.get("severity_when"), f"Rule {self.id}: severity_when").items()
+        ]
+        self.resource = issue.get("resource", DEFAULT_RESOURCES[self.target])
+        self.description = issue.get("description", "")
+        self.recommendation = spec.get("recommendation")
+        if self.recommendation is not None:
+            recommendation = _mapping(self.recommendation, f"Rule {self.id}: recommendation")
+            if not recommendation.get("action"):
+                raise RuleError(f"Rule {self.id}: recommendation.action is required")
+            fallback = recommendation.get("fallback")
+            if fallback is not None and not _mapping(fallback, f"Rule {self.id}: fallback").get("action"):
+                raise RuleError(f"Rule {self.id}: fallback.action is required")
+
+    def build_issue(self, obj, namespace: str) -> Issue:
+        severity = self.severity
+        for candidate, conditions in self.severity_when:
+            if _matches(conditions, obj):
+                severity = candidate
+                break
+        return Issue(
+            type=self.issue_type,
+            severity=severity,
+            resource=render_template(self.resource, obj),
+            description=render_template(self.description, obj),
+            namespace=obj.get("namespace") or namespace
+        )
+
+class RuleSet:
+    """An immutable, compiled set of rules with per-key-value buckets"""
+
+    def __init__(self, rules: List[CompiledRule]):
+        self.rules = rules
+        self._by_target: Dict[str, List[CompiledRule]] = {t: [r for r in rules if r.target == t] for t in TARGETS}
+        self._buckets: Dict[str, Dict[Any, List[CompiledRule]]] = {t: {} for t in TARGETS}
+        self._bucket_lock = threading.Lock()
+        self.recommendations: Dict[str, Dict[str, Any]] = {}
+        for rule in rules:
+            if rule.recommendation and rule.issue_type not in self.recommendations:
+                self.recommendations[rule.issue_type] = rule.recommendation
+
+        log_rules = self._by_target["log"]
+        # A log line can only match if it matches at least one rule's pattern;
+        # rules without a plain regex disable the prefilter.
+        self.log_prefilter = None
+        if log_rules and all(r.message_pattern for r in log_rules):
+            try:
+                self.log_prefilter = re.compile("|".join(_scoped(r.message_pattern) for r in log_rules))
+            except re.error as e:
+                logger.warning(f"Log rules cannot be combined into a prefilter: {e}")
+
+    def candidates(self, target: str, obj) -> List[CompiledRule]:
+        """Rules whose key condition matches the object's key value, in definition order"""
+        key_field = KEY_FIELDS[target]
+        if key_field is None:
+            return self._by_target[target]
+        value = obj.get(key_field)
+        buckets = self._buckets[target]
+        bucket = buckets.get(value)
+        if bucket is None:
+            bucket = [r for r in self._by_target[target] if r.key_predicate is None or r.key_predicate(value)]
+            with self._bucket_lock:
+                if len(buckets) >= MAX_BUCKETS:
+                    buckets.clear()
+                buckets[value] = bucket
+        return bucket
+
+    def evaluate(self, target: str, obj, namespace: str) -> List[Issue]:
+        """Evaluate all candidate rules against one object"""
+        if target == "log" and self.log_prefilter is not None:
+            message = obj.get("message")
+            if not message or not self.log_prefilter.search(message):
+                return []
+        issues = []
+        fired_groups = None
+        for rule in self.candidates(target, obj):
+            if rule.group is not None and fired_groups and rule.group in fired_groups:
+                continue
+            if not _matches(rule.conditions, obj):
+                continue
+            issues.append(rule.build_issue(obj, namespace))
+            if rule.group is not None:
+                fired_groups = fired_groups or set()
+                fired_groups.add(rule.group)
+        return issues
+
+def _load_file(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        data = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+    if data is None:
+        return []
+    rules = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise RuleError(f"{path}: expected a list of rules or a mapping with a 'rules' list")
+    return rules
+
+def _rule_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith((".yaml", ".yml", ".json"))
+            )
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            logger.warning(f"Rules path does not exist: {path}")
+    return files
+
+class RuleEngine:
+    """Loads rule files, compiles them and hot-reloads them when they change"""
+
+    def __init__(self, paths: Optional[List[str]] = None, reload_interval: float = None):
+        if paths is None:
+            paths = [DEFAULT_RULES_PATH] + [p for p in settings.RULES_PATH.split(",") if p]
+        self.paths = paths
+        self.reload_interval = settings.RULES_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self._signature = None
+        self._last_check = 0.0
+        self.ruleset = RuleSet([])
+        self.reload(force=True)
+
+    def _current_signature(self) -> Tuple:
+        signature = []
+        for path in _rule_files(self.paths):
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+        return tuple(signature)
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile rules if any file changed; the previous set stays active on errors"""
+        signature = self._current_signature()
+        if not force and signature == self._signature:
+            return False
+        try:
+            compiled = []
+            seen_ids = set()
+            for path, _, _ in signature:
+                for spec in _load_file(path):
+                    rule = CompiledRule(spec, os.path.basename(path))
+                    if rule.id in seen_ids:
+                        raise RuleError(f"Duplicate rule id: {rule.id}")
+                    seen_ids.add(rule.id)
+                    compiled.append(rule)
+        except (RuleError, OSError, yaml.YAMLError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load rules, keeping previous rule set: {e}")
+            self._signature = signature
+            return False
+        except Exception as e:
+            # A malformed file must never break analyses or startup
+            logger.exception(f"Unexpected error loading rules, keeping previous rule set: {e}")
+            self._signature = signature
+            return False
+        self.ruleset = RuleSet(compiled)
+        self._signature = signature
+        logger.info(f"Loaded {len(compiled)} detection rules from {len(signature)} file(s)")
+        return True
+
+    def maybe_reload(self):
+        """Cheap periodic check for changed rule files"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        self.reload()
@@ -0,0 +1,76 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AnalysisScheduler:
+    """Periodically runs analysis for configured namespaces of the connected cluster.
+
+    Each namespace gets its own loop with a jittered interval, so runs do
+    not line up; a shared semaphore caps how many analyses run at once.
+    """
+
+    def __init__(self, run: Callable[[str], Awaitable[None]], is_ready: Callable[[], bool],
+                 namespaces: List[str], interval: float, jitter: float = 0.1, concurrency: int = 2,
+                 on_cycle: Optional[Callable[[], Awaitable[None]]] = None, cycle_interval: float = 3600):
+        self.run = run
+        self.is_ready = is_ready
+        self.namespaces = [ns for ns in namespaces if ns]
+        self.interval = interval
+        self.jitter = jitter
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.on_cycle = on_cycle
+        self.cycle_interval = cycle_interval
+        self.last_run: Dict[str, float] = {}
+        self.last_error: Dict[str, str] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def _next_delay(self) -> float:
+        return max(1.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def _namespace_loop(self, namespace: str):
+        # Stagger the first run of each namespace across one interval
+        await asyncio.sleep(random.uniform(0, min(self.interval, 5.0)))
+        while True:
+            if self.is_ready():
+                async with self.semaphore:
+                    try:
+                        await self.run(namespace)
+                        self.last_run[namespace] = time.time()
+                        self.last_error.pop(namespace, None)
+                    except Exception as e:
+                        logger.error(f"Scheduled analysis failed for {namespace}: {e}")
+                        self.last_error[namespace] = str(e)
+            await asyncio.sleep(self._next_delay())
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(self.cycle_interval)
+            try:
+                await self.on_cycle()
+            except Exception as e:
+                logger.error(f"Scheduler maintenance failed: {e}")
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._namespace_loop(ns)) for ns in self.namespaces]
+        if self.on_cycle is not None:
+            self._tasks.append(asyncio.create_task(self._maintenance_loop()))
+        logger.info(f"Scheduled analysis every ~{self.interval:.0f}s for: {', '.join(self.namespaces)}")
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            ns: {"last_run": self.last_run.get(ns), "last_error": self.last_error.get(ns)}
+            for ns in self.namespaces
+        }
@@ -0,0 +1,106 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from typing import Any, Iterable, List, Optional
+import hashlib
+import orjson
+
+from models import POD_RECORD_FIELDS
+
+def _default(obj: Any):
+    """Fallback for types orjson does not handle natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serialize content with orjson (dataclasses, datetimes and numpy handled natively)"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+# Responses under these paths are streamed and must not be buffered by compression
+STREAMING_PATHS = ("/api/analyze/stream",)
+
+def ndjson_record(kind: str, data: Any) -> bytes:
+    """One newline-delimited JSON record: {"type": kind, "data": data}"""
+    return dumps({"type": kind, "data": data}) + b"\n"
+
+def sse_record(kind: str, data: Any) -> bytes:
+    """One Server-Sent Events message with the record type as the event name"""
+    return b"event: " + kind.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+class StreamingAwareCompression:
+    """Wraps a compression middleware so streaming endpoints bypass it.
+
+    Compressors hold back output until enough bytes accumulate, which would
+    delay the first records of a stream.
+    """
+
+    def __init__(self, app, compressor, **options):
+        self.app = app
+        self.compressed = compressor(app, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(STREAMING_PATHS):
+            return await self.app(scope, receive, send)
+        return await self.compressed(scope, receive, send)
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed response for large payloads.
+
+    Unlike the default response, content is not passed through
+    jsonable_encoder, so PodRecord lists are encoded in a single pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a ?fields=name,status query parameter against PodRecord fields"""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in POD_RECORD_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown pod field(s): {', '.join(unknown)}. Valid fields: {', '.join(sorted(POD_RECORD_FIELDS))}"
+        )
+    return selected
+
+def select_fields(records: Iterable[Any], fields: Optional[List[str]]) -> List[Any]:
+    """Project records onto the requested fields (or return them unchanged)"""
+    if not fields:
+        return list(records)
+    return [{f: getattr(r, f) for f in fields} for r in records]
+
+def body_etag(body: bytes) -> str:
+    """Weak ETag derived from the encoded response body"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes on either side
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag[2:] if tag.startswith("W/") else tag) == wanted
+        for tag in (t.strip() for t in header.split(","))
+    )
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def conditional_body_response(request: Request, body: bytes, etag: Optional[str] = None,
+                              headers: Optional[dict] = None) -> Response:
+    """Return already-encoded JSON, or 304 Not Modified if the client already has it"""
+    etag = etag or body_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "no-cache", **(headers or {})})
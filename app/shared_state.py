@@ -0,0 +1,243 @@
+from typing import Any, Callable, Optional
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import asyncio
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+class StateBackend:
+    """Small key/value store for state that all workers must agree on.
+
+    Holds the cluster connection, connection status, shared caches and
+    leases. Values are JSON-encodable; ``ttl`` is in seconds. Code on the
+    event loop uses the ``a*`` methods, which run the blocking SQLite or
+    Redis round trip in a worker thread.
+    """
+    # False when the state only lives in this process
+    shared = True
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """Take or renew a lease; True if ``owner`` holds it afterwards"""
+        raise NotImplementedError
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+    async def aacquire(self, key: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self.acquire, key, owner, ttl)
+
+class MemoryBackend(StateBackend):
+    """In-process state for single-worker deployments"""
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        current = self.get(key)
+        if current is not None and current != owner:
+            return False
+        self.set(key, owner, ttl)
+        return True
+
+    # In-process dict operations never block, so skip the thread hop
+    async def aget(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(key, value, ttl)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+    async def aacquire(self, key: str, owner: str, ttl: float) -> bool:
+        return self.acquire(key, owner, ttl)
+
+class SQLiteBackend(StateBackend):
+    """Host-local shared state for workers forked from one master.
+
+    Lives in a SQLite file, by default on /dev/shm so it stays in memory.
+    Connections are opened per process, after the fork.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if not path:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            path = os.path.join(base, f"eks-troubleshooter-{os.getuid() if hasattr(os, 'getuid') else 0}.db")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM state WHERE key = ? AND (expires IS NULL OR expires >= ?)", (key, time.time())
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO state (key, value, expires) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), time.time() + ttl if ttl else None)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        encoded = orjson.dumps(owner)
+        with self._lock:
+            changed = self._connection().execute(
+                "INSERT INTO state (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+                "WHERE state.value = excluded.value OR state.expires < ?",
+                (key, encoded, now + ttl, now)
+            ).rowcount
+        return changed > 0
+
+class RedisBackend(StateBackend):
+    """State in any Redis-protocol server (Redis, Valkey, KeyDB, ...) for multi-host setups"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("STATE_BACKEND=redis:// requires the 'redis' package")
+        self.url = url
+        self.prefix = "eks-troubleshooter:"
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(self.prefix + key)
+        return orjson.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._client.set(self.prefix + key, orjson.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        encoded = orjson.dumps(owner)
+        if self._client.set(self.prefix + key, encoded, nx=True, px=int(ttl * 1000)):
+            return True
+        if self._client.get(self.prefix + key) == encoded:
+            self._client.pexpire(self.prefix + key, int(ttl * 1000))
+            return True
+        return False
+
+def create_backend(url: str, workers: int = 1) -> StateBackend:
+    """Build a backend from STATE_BACKEND.
+
+    ``memory://`` (in-process), ``local://[path]`` (SQLite shared by workers
+    on this host) or ``redis://...``. Empty picks memory for one worker and
+    local otherwise.
+    """
+    if not url:
+        url = "memory://" if workers <= 1 else "local://"
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("local://"):
+        return SQLiteBackend(url[len("local://"):] or None)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unknown STATE_BACKEND: {url}")
+
+def process_id() -> str:
+    """Identifies this worker process; evaluated after the fork"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+async def locked_update(state: StateBackend, key: str, update: Callable[[Any], Any],
+                        ttl: Optional[float] = None, wait: float = 2.0) -> Any:
+    """Read-modify-write ``key`` under a short lease so concurrent workers do not lose updates.
+
+    Returns the previous value; raises TimeoutError if the lease is not free
+    within ``wait`` seconds.
+    """
+    lock, owner = f"lock:{key}", f"{process_id()}:{uuid.uuid4().hex}"
+    deadline = time.monotonic() + wait
+    while not await state.aacquire(lock, owner, 5):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out waiting for {lock}")
+        await asyncio.sleep(0.01)
+    try:
+        previous = await state.aget(key)
+        await state.aset(key, update(previous), ttl)
+        return previous
+    finally:
+        await state.adelete(lock)
+
+async def run_as_leader(state: StateBackend, name: str, on_acquired, on_lost, ttl: float = 30):
+    """Run on_acquired/on_lost as this process gains or loses the ``name`` lease.
+
+    Used so only one worker runs cluster-wide background jobs.
+    """
+    leader = False
+    key = f"lease:{name}"
+    while True:
+        try:
+            held = await state.aacquire(key, process_id(), ttl)
+        except Exception as e:
+            logger.error(f"Lease check for {name} failed: {e}")
+            held = False
+        if held != leader:
+            leader = held
+            if leader:
+                logger.info(f"Acquired {name} lease in {process_id()}")
+                on_acquired()
+            else:
+                logger.info(f"Lost {name} lease in {process_id()}")
+                on_lost()
+        await asyncio.sleep(ttl / 3)